@@ -7,6 +7,8 @@ import json
 from qchess.quantum_chess import QChess
 from qchess.tutorial_qchess import TutorialQChess
 from qchess.tutorial_progress import TutorialProgress
+from qchess.engines import get_engine_names
+from qchess.save import load_game
 
 
 def signal_handler(sig, frame):
@@ -27,6 +29,15 @@ def main():
     parser.add_argument('--ascii-render', help='use the basic ascii renderer instead of PySimpleGUI',
                         action='store_true')
 
+    parser.add_argument('--engine', help='select the simulator, overriding the one of the game mode (default: auto)',
+                        choices=get_engine_names())
+
+    parser.add_argument('--max-bond-dimension', help='limit the bonds of the mps engine (selected by default with this option)',
+                        type=int, metavar='N')
+
+    parser.add_argument('--seed', help='seed the measurements to replay the same game, overriding the one of the game mode',
+                        type=int)
+
     group = parser.add_mutually_exclusive_group()
 
     group.add_argument('--game-mode', help='select a specific game mode from its configuration file in game_modes/',
@@ -38,10 +49,25 @@ def main():
     group.add_argument('--guided-tutorials',
                        help='run all the tutorials in order and keep track of the progress made', action='store_true')
 
+    group.add_argument(
+        '--load', help='continue a game saved with the save command of the ascii renderer', metavar='PATH')
+
     args = parser.parse_args()
 
+    engine = args.engine
+    engine_options = None
+
+    if args.max_bond_dimension is not None:
+        if engine is None:
+            engine = 'mps'
+        elif engine != 'mps':
+            parser.error('--max-bond-dimension can only be used with the mps engine')
+
+        engine_options = {'mps': {'max_bond_dimension': args.max_bond_dimension}}
+
     if args.guided_tutorials:
-        tutorial_progress = TutorialProgress(args.ascii_render)
+        tutorial_progress = TutorialProgress(
+            args.ascii_render, engine=engine, engine_options=engine_options, seed=args.seed)
         tutorial_progress.main_loop()
 
     else:
@@ -54,7 +80,19 @@ def main():
                 print('Please note that the ' + epilog)
                 return
 
-            qchess = TutorialQChess(json.load(json_data))
+            qchess = TutorialQChess(json.load(json_data), engine=engine,
+                                    engine_options=engine_options, seed=args.seed)
+
+        elif args.load:
+            #the saved game keeps its own engine
+            try:
+                qchess = load_game(args.load)
+            except FileNotFoundError:
+                print('Error while loading saved game - File not found')
+                return
+            except (OSError, ValueError) as error:
+                print('Error while loading saved game - ' + str(error))
+                return
 
         else:
             try:
@@ -65,7 +103,8 @@ def main():
                 print('Please note that the ' + epilog)
                 return
 
-            qchess = QChess(0, 0, game_mode=json.load(json_data))
+            qchess = QChess(0, 0, game_mode=json.load(json_data),
+                            engine=engine, engine_options=engine_options, seed=args.seed)
 
             print(
                 '\nRemember to give the program some time if it freezes (simulations may take a while)\n')
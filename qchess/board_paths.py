@@ -0,0 +1,115 @@
+from .point import Point
+
+"""
+Straight paths of a board, built once for every board size and shared by
+all the games of that size.
+Every square keeps a ray of array indices in each of the 8 directions (up
+to the edge of the board), so the path between two squares in a line is
+the start of one of the rays of the source, found without any division.
+The path of every (source, target) pair is kept the first time it's used,
+as a tuple of array indices and as a tuple of Points, so later calls
+return the same tuples without creating anything.
+"""
+
+_board_paths = {}
+
+
+def get_board_paths(width, height):
+    key = (width, height)
+
+    if key not in _board_paths:
+        _board_paths[key] = BoardPaths(width, height)
+
+    return _board_paths[key]
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+#index of the direction of a step, each coordinate in -1, 0 or 1
+def _direction(step_x, step_y):
+    return (step_x + 1) * 3 + step_y + 1
+
+
+class BoardPaths:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        #same order as QChess.get_board_point
+        self.points = tuple(Point(index % width, index // width) for index in range(width * height))
+
+        #rays[index][direction], the direction without movement is left empty
+        self.rays = []
+
+        for point in self.points:
+            rays = [()] * 9
+
+            for step_x in (-1, 0, 1):
+                for step_y in (-1, 0, 1):
+                    ray = []
+                    x = point.x + step_x
+                    y = point.y + step_y
+
+                    while (step_x or step_y) and 0 <= x < width and 0 <= y < height:
+                        ray.append(width * y + x)
+                        x += step_x
+                        y += step_y
+
+                    rays[_direction(step_x, step_y)] = tuple(ray)
+
+            self.rays.append(rays)
+
+        #paths already used, by the array indices of source and target
+        self.path_indices = {}
+        self.path_points = {}
+
+    #array indices of the squares between source and target (both Points),
+    #empty if they aren't in the board or in the same row, column or diagonal
+    def get_path_indices(self, source, target):
+        key = self._get_key(source, target)
+        if key is None:
+            return ()
+
+        path = self.path_indices.get(key)
+        if path is None:
+            path = self.path_indices[key] = self._find_path(source, target)
+
+        return path
+
+    #same as get_path_indices, with the squares as Points
+    def get_path_points(self, source, target):
+        key = self._get_key(source, target)
+        if key is None:
+            return ()
+
+        path = self.path_points.get(key)
+        if path is None:
+            points = self.points
+            path = self.path_points[key] = tuple(
+                points[index] for index in self.get_path_indices(source, target))
+
+        return path
+
+    #array indices of source and target, None if any of them isn't in the board
+    def _get_key(self, source, target):
+        if not (0 <= source.x < self.width and 0 <= source.y < self.height):
+            return None
+        if not (0 <= target.x < self.width and 0 <= target.y < self.height):
+            return None
+
+        return (self.width * source.y + source.x, self.width * target.y + target.x)
+
+    def _find_path(self, source, target):
+        dx = target.x - source.x
+        dy = target.y - source.y
+
+        if dx != 0 and dy != 0 and abs(dx) != abs(dy):
+            return ()
+
+        source_index = self.width * source.y + source.x
+        ray = self.rays[source_index][_direction(_sign(dx), _sign(dy))]
+
+        #source == target has no direction, so its ray is empty
+        return ray[:max(abs(dx), abs(dy)) - 1]
@@ -0,0 +1,89 @@
+import importlib
+
+"""
+Registry of the simulators QChess can use, by name.
+Every entry holds the module and the class name, so an engine
+(and its dependencies, like qiskit) is only imported when it's selected.
+"""
+
+ENGINES = {
+    'factorized': ('qchess.engines.statevector.statevector_engine', 'FactorizedEngine'),
+    'sparse': ('qchess.engines.sparse.sparse_engine', 'SparseEngine'),
+    'mps': ('qchess.engines.mps.mps_engine', 'MPSEngine'),
+    'statevector': ('qchess.engines.statevector.statevector_engine', 'StatevectorEngine'),
+    'qiskit': ('qchess.engines.qiskit.qiskit_engine', 'QiskitEngine'),
+}
+
+#engines tried by 'auto' in order, the ones without a board size limit first
+#(factorized is the lightest, its memory only depends on the entanglement groups)
+AUTO_ORDER = ['factorized', 'sparse', 'mps', 'statevector', 'qiskit']
+
+DEFAULT_ENGINE = 'auto'
+
+
+"""
+Make a new engine available by name.
+If auto is True it's tried by 'auto' before the existing ones.
+"""
+
+
+def register_engine(name, module, class_name, auto=False):
+    ENGINES[name] = (module, class_name)
+
+    if auto and name not in AUTO_ORDER:
+        AUTO_ORDER.insert(0, name)
+
+
+def get_engine_names():
+    return ['auto'] + list(ENGINES)
+
+
+#registry name of an engine class, None if it isn't registered
+def get_engine_name(engine):
+    for name, (module, class_name) in ENGINES.items():
+        if engine.__module__ == module and engine.__name__ == class_name:
+            return name
+
+    return None
+
+
+def load_engine(name):
+    if name not in ENGINES:
+        raise ValueError('Unknown engine {}, available engines are: {}'.format(
+            name, ', '.join(get_engine_names())))
+
+    module, class_name = ENGINES[name]
+    return getattr(importlib.import_module(module), class_name)
+
+
+"""
+Get the engine class selected by name for a board of that size.
+'auto' returns the first engine of AUTO_ORDER that can be imported
+and can simulate the board, or the first one that can be imported
+if none of them can. With the default order that is always factorized,
+the others are only tried if it can't be imported or an engine is
+registered before it.
+"""
+
+
+def get_engine_class(name, width, height):
+    if name != 'auto':
+        return load_engine(name)
+
+    available = []
+    for engine_name in AUTO_ORDER:
+        try:
+            engine = load_engine(engine_name)
+        except ImportError:
+            #missing optional dependency
+            continue
+
+        if not engine.is_board_too_large(width, height):
+            return engine
+
+        available.append(engine)
+
+    if not available:
+        raise ImportError('None of the engines could be imported')
+
+    return available[0]
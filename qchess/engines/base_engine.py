@@ -71,3 +71,31 @@ class BaseEngine(ABC):
     @abstractmethod
     def collapse_all(self):
         raise NotImplementedError()
+
+    """
+    Copy of the engine for qchess, a fork of the game (see QChess.fork).
+    Both engines must be independent afterwards, but they can share the
+    simulated state until one of them changes it.
+    Required by QChess.
+    """
+    @abstractmethod
+    def fork(self, qchess):
+        raise NotImplementedError()
+
+    """
+    Get the probability of every square (by array index) holding a piece.
+    Meant to be called often (for example to draw a heatmap every frame),
+    so engines should cache it between moves.
+    """
+    @abstractmethod
+    def get_occupancy_probabilities(self):
+        raise NotImplementedError()
+
+    """
+    Check if the simulation may not fit in memory for a board of that size.
+    Used by the 'auto' engine selection (see qchess.engines), engines
+    without a limit don't need to override it.
+    """
+    @classmethod
+    def is_board_too_large(cls, width, height):
+        return False
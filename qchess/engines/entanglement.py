@@ -0,0 +1,185 @@
+import heapq
+
+"""
+Entanglement groups of the pieces, as a union-find over their qflags.
+Every piece added to the board gets a qflag of its own (a single bit),
+and the groups of two qflags are joined when their pieces get entangled.
+Each group keeps its qflags (one per original piece) and the array
+indices of the squares holding its pieces, so finding, joining and
+listing a group don't depend on the size of the board.
+
+The bits of the qflags that are no longer used are given again to new
+pieces (lowest first), so a mask of qflags is never wider than the
+largest number of pieces that were on the board at the same time.
+"""
+
+
+#single bit qflags of a mask, lowest first
+def split_qflags(mask):
+    qflags = []
+
+    while mask:
+        qflag = mask & -mask
+        qflags.append(qflag)
+        mask ^= qflag
+
+    return qflags
+
+
+class EntanglementGroups:
+    def __init__(self):
+        #parent of every qflag, the root of a group is its own parent
+        self.parent = {}
+
+        #qflags and squares of every group, by the qflag at its root
+        self.qflags = {}
+        self.squares = {}
+
+        #bit of the next new qflag, and bits of the released ones (a heap)
+        self.next_index = 0
+        self.free_indices = []
+
+        #qflags whose group lost its last square, released when a new qflag is needed
+        #(the piece may be placed back in the same move, see new_qflag)
+        self.emptied = set()
+
+    def __contains__(self, qflag):
+        return qflag in self.parent
+
+    #add a group with only qflag
+    def add(self, qflag):
+        self.parent[qflag] = qflag
+        self.qflags[qflag] = [qflag]
+        self.squares[qflag] = set()
+
+    #add a group with a new qflag, reusing a released one if possible
+    def new_qflag(self):
+        self.release_emptied()
+
+        qflag = None
+        while self.free_indices:
+            index = heapq.heappop(self.free_indices)
+
+            #the qflag may be used again by a piece placed back on the board
+            if 1 << index not in self.parent:
+                qflag = 1 << index
+                break
+
+        if qflag is None:
+            qflag = 1 << self.next_index
+            self.next_index += 1
+
+        self.add(qflag)
+
+        return qflag
+
+    #qflags that aren't in any group can be given to new pieces
+    def release(self, qflags):
+        for qflag in qflags:
+            heapq.heappush(self.free_indices, qflag.bit_length() - 1)
+
+    #release the groups that are still empty
+    def release_emptied(self):
+        for qflag in self.emptied:
+            if qflag in self.parent and not self.get_squares(qflag):
+                qflags, squares = self.remove(qflag)
+                self.release(qflags)
+
+        self.emptied.clear()
+
+    def find(self, qflag):
+        parent = self.parent
+
+        #path halving, every qflag visited skips its parent next time
+        while parent[qflag] != qflag:
+            parent[qflag] = parent[parent[qflag]]
+            qflag = parent[qflag]
+
+        return qflag
+
+    #join the groups of both qflags, returns the root of the joined group
+    def union(self, qflag1, qflag2):
+        root1 = self.find(qflag1)
+        root2 = self.find(qflag2)
+
+        if root1 == root2:
+            return root1
+
+        #the smaller group is moved into the larger one
+        if len(self.qflags[root1]) < len(self.qflags[root2]):
+            root1, root2 = root2, root1
+
+        self.parent[root2] = root1
+        self.qflags[root1] += self.qflags.pop(root2)
+        self.squares[root1] |= self.squares.pop(root2)
+
+        return root1
+
+    def get_qflags(self, qflag):
+        return self.qflags[self.find(qflag)]
+
+    def get_squares(self, qflag):
+        return self.squares[self.find(qflag)]
+
+    def add_square(self, qflag, index):
+        self.squares[self.find(qflag)].add(index)
+
+    def remove_square(self, qflag, index):
+        squares = self.squares[self.find(qflag)]
+        squares.discard(index)
+
+        if not squares:
+            self.emptied.add(qflag)
+
+    #remove the group of qflag, returns its qflags and squares
+    def remove(self, qflag):
+        root = self.find(qflag)
+
+        qflags = self.qflags.pop(root)
+        squares = self.squares.pop(root)
+
+        for other in qflags:
+            del self.parent[other]
+
+        return qflags, squares
+
+    """
+    Information needed to restore the groups, as a dict that can be stored
+    as json (see qchess.save). The squares are restored from the board.
+    """
+    def save(self):
+        return {
+            'groups': list(self.qflags.values()),
+            'next_index': self.next_index,
+            'free_indices': sorted(self.free_indices),
+            'emptied': sorted(self.emptied)
+        }
+
+    @classmethod
+    def load(cls, info):
+        groups = cls()
+
+        for qflags in info['groups']:
+            for qflag in qflags:
+                groups.add(qflag)
+                groups.union(qflags[0], qflag)
+
+        groups.next_index = info['next_index']
+
+        #a sorted list is a valid heap
+        groups.free_indices = list(info['free_indices'])
+        groups.emptied = set(info['emptied'])
+
+        return groups
+
+    def copy(self):
+        groups = EntanglementGroups()
+        groups.parent = dict(self.parent)
+        groups.qflags = {root: list(qflags) for root, qflags in self.qflags.items()}
+        groups.squares = {root: set(squares) for root, squares in self.squares.items()}
+
+        groups.next_index = self.next_index
+        groups.free_indices = list(self.free_indices)
+        groups.emptied = set(self.emptied)
+
+        return groups
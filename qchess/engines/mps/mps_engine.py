@@ -0,0 +1,52 @@
+from .mps_state import MPSState
+
+from qchess.engines.statevector.statevector_engine import StatevectorEngine
+
+
+"""
+Same as StatevectorEngine, but the board is simulated as a matrix product
+state (see MPSState). The squares follow the board in a snake, row by row
+(or column by column if the board is wider than tall), so neighbouring
+squares stay close in the chain.
+"""
+
+
+class MPSEngine(StatevectorEngine):
+    state_class = MPSState
+
+    def __init__(self, qchess, width, height, max_bond_dimension=None, seed=None):
+        self.max_bond_dimension = max_bond_dimension
+
+        super().__init__(qchess, width, height, seed=seed)
+
+    def get_options(self):
+        return {'max_bond_dimension': self.max_bond_dimension}
+
+    @classmethod
+    def is_board_too_large(cls, width, height):
+        #memory depends on the entanglement, not on the board
+        return False
+
+    #position in the chain of the square with every array index
+    def get_snake_sites(self):
+        by_rows = self.width <= self.height
+        sites = [0] * (self.width * self.height)
+
+        for y in range(self.height):
+            for x in range(self.width):
+                if by_rows:
+                    line, position, length = y, x, self.width
+                else:
+                    line, position, length = x, y, self.height
+
+                #every other line is walked backwards
+                if line % 2 == 1:
+                    position = length - 1 - position
+
+                sites[self.qchess.get_array_index(x, y)] = line * length + position
+
+        return sites
+
+    def create_state(self):
+        return self.state_class(self.width * self.height, self.rng, sites=self.get_snake_sites(),
+                                max_bond_dimension=self.max_bond_dimension)
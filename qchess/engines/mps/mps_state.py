@@ -0,0 +1,323 @@
+import copy
+import math
+
+import numpy as np
+
+from qchess.engines.statevector import sutils
+
+"""
+Board state stored as a matrix product state (MPS).
+Every square is a site of a chain with a tensor of shape (left bond, 2, right bond),
+so the memory needed depends on the entanglement between both sides of every
+cut of the chain instead of the size of the board. The squares are placed on
+the chain in the order given by sites, which should keep neighbouring squares
+close to each other.
+
+The state is always left canonical (every tensor but the last one is an
+isometry), so the probabilities of the measurements can be computed from
+the right end of the chain.
+If max_bond_dimension is given, the smallest singular values of every bond
+are discarded over that limit, and the simulation is no longer exact.
+"""
+
+
+def _gate_operators(matrix):
+    #operator Schmidt decomposition of a two qubit gate, sum_k left[k] (x) right[k]
+    gate = matrix.reshape(2, 2, 2, 2).transpose(0, 2, 1, 3).reshape(4, 4)
+    u, s, vh = np.linalg.svd(gate)
+
+    rank = int(np.sum(s > 1e-12))
+    left = [(u[:, k] * s[k]).reshape(2, 2) for k in range(rank)]
+    right = [vh[k].reshape(2, 2) for k in range(rank)]
+
+    return left, right
+
+
+ISWAP = _gate_operators(np.array([
+    [1, 0, 0, 0],
+    [0, 0, 1j, 0],
+    [0, 1j, 0, 0],
+    [0, 0, 0, 1]
+]))
+
+ISWAP_SQRT = _gate_operators(np.array([
+    [1, 0, 0, 0],
+    [0, 1 / math.sqrt(2), 1j / math.sqrt(2), 0],
+    [0, 1j / math.sqrt(2), 1 / math.sqrt(2), 0],
+    [0, 0, 0, 1]
+]))
+
+
+class MPSState:
+    def __init__(self, num_qubits, rng, sites=None, max_bond_dimension=None):
+        self.num_qubits = num_qubits
+        self.rng = rng
+        self.max_bond_dimension = max_bond_dimension
+
+        #position of every qubit in the chain
+        if sites is None:
+            sites = list(range(num_qubits))
+
+        self.sites = sites
+
+        #|0...0>
+        self.tensors = []
+        for i in range(num_qubits):
+            tensor = np.zeros((1, 2, 1), dtype=complex)
+            tensor[0, 0, 0] = 1
+
+            self.tensors.append(tensor)
+
+    #same as DenseState.save
+    def save(self):
+        info = {
+            'num_qubits': self.num_qubits,
+            'sites': self.sites,
+            'max_bond_dimension': self.max_bond_dimension
+        }
+
+        return info, {'tensor{}'.format(i): tensor for i, tensor in enumerate(self.tensors)}
+
+    @classmethod
+    def load(cls, info, arrays, rng):
+        state = cls(info['num_qubits'], rng, sites=list(info['sites']),
+                    max_bond_dimension=info['max_bond_dimension'])
+        state.tensors = [arrays['tensor{}'.format(i)] for i in range(state.num_qubits)]
+
+        return state
+
+    #same as DenseState.fork, the tensors are never changed in place
+    def fork(self, rng):
+        state = copy.copy(self)
+        state.rng = rng
+        state.tensors = list(self.tensors)
+
+        return state
+
+    #largest bond of the chain
+    def bond_dimension(self):
+        return max([tensor.shape[2] for tensor in self.tensors] + [1])
+
+    def x(self, qubit):
+        site = self.sites[qubit]
+
+        #a unitary on a single site keeps the canonical form
+        self.tensors[site] = self.tensors[site][:, ::-1, :].copy()
+
+    def iswap(self, qubit1, qubit2):
+        self._apply_gate(qubit1, qubit2, ISWAP)
+
+    def iswap_sqrt(self, qubit1, qubit2):
+        self._apply_gate(qubit1, qubit2, ISWAP_SQRT)
+
+    #both gates are symmetric, so the order of the qubits doesn't matter
+    def _apply_gate(self, qubit1, qubit2, operators):
+        first, last = sorted([self.sites[qubit1], self.sites[qubit2]])
+        left, right = operators
+        rank = len(left)
+
+        #the gate as a matrix product operator, the squares in between only carry the bond
+        mpo = [np.array(left).reshape(1, rank, 2, 2)]
+
+        identity = np.einsum('lr,oi->lroi', np.eye(rank), np.eye(2))
+        mpo += [identity] * (last - first - 1)
+
+        mpo.append(np.array(right).reshape(rank, 1, 2, 2))
+
+        self._apply_mpo(first, mpo)
+        self._compress()
+
+    """
+    Apply a matrix product operator to the sites first, first + 1, ...
+    Every operator has the axes (left bond, right bond, output, input),
+    with left bond 1 in the first one and right bond 1 in the last one.
+    """
+    def _apply_mpo(self, first, mpo):
+        for i, operator in enumerate(mpo):
+            tensor = self.tensors[first + i]
+
+            #the new bonds are (old bond, operator bond) on both sides
+            tensor = np.einsum('lroi,aib->alobr', operator, tensor)
+            shape = tensor.shape
+
+            self.tensors[first + i] = tensor.reshape(
+                shape[0] * shape[1], 2, shape[3] * shape[4])
+
+    """
+    Bring the chain back to the left canonical form with the smallest bonds,
+    discarding the singular values over max_bond_dimension, and normalize it.
+    """
+    def _compress(self):
+        #right canonical form first, so every truncation below is optimal
+        for site in range(self.num_qubits - 1, 0, -1):
+            tensor = self.tensors[site]
+            left_bond, _, right_bond = tensor.shape
+
+            q, r = np.linalg.qr(tensor.reshape(left_bond, 2 * right_bond).T)
+
+            self.tensors[site] = q.T.reshape(-1, 2, right_bond)
+            self.tensors[site - 1] = np.einsum(
+                'aib,cb->aic', self.tensors[site - 1], r)
+
+        for site in range(self.num_qubits - 1):
+            tensor = self.tensors[site]
+            left_bond, _, right_bond = tensor.shape
+
+            u, s, vh = np.linalg.svd(
+                tensor.reshape(left_bond * 2, right_bond), full_matrices=False)
+
+            #remove rounding errors
+            keep = max(1, int(np.sum(s ** 2 > sutils.EPSILON * np.sum(s ** 2))))
+            if self.max_bond_dimension is not None:
+                keep = min(keep, self.max_bond_dimension)
+
+            self.tensors[site] = u[:, :keep].reshape(left_bond, 2, keep)
+            self.tensors[site + 1] = np.einsum(
+                'ab,bic->aic', s[:keep, None] * vh[:keep], self.tensors[site + 1])
+
+        last = self.num_qubits - 1
+        if last >= 0:
+            #not in place, the tensor may be shared with a fork
+            self.tensors[last] = self.tensors[last] / np.linalg.norm(self.tensors[last])
+
+    """
+    Joint distribution of the qubits, as a dict from their values (tuple of
+    bools in the same order) to probability. Only the values with a nonzero
+    probability are included.
+    """
+    def _distribution(self, qubits):
+        measured = {self.sites[qubit]: j for j, qubit in enumerate(qubits)}
+        first = min(measured)
+
+        #environment of the chain right of the site for every partial outcome,
+        #the left part is an isometry so its trace is the probability of the outcome
+        branches = {(): np.ones((1, 1), dtype=complex)}
+
+        for site in range(self.num_qubits - 1, first - 1, -1):
+            tensor = self.tensors[site]
+            new_branches = {}
+
+            for values, environment in branches.items():
+                #E'[a, c] = sum_p A[a, p, b] E[b, d] conj(A[c, p, d])
+                partial = np.einsum(
+                    'apb,bd,cpd->pac', tensor, environment, tensor.conj())
+
+                if site not in measured:
+                    new_branches[values] = partial[0] + partial[1]
+                    continue
+
+                for value in (0, 1):
+                    if np.trace(partial[value]).real > sutils.EPSILON:
+                        new_branches[values + ((site, value),)] = partial[value]
+
+            branches = new_branches
+
+        distribution = {}
+        for values, environment in branches.items():
+            ordered = [False] * len(qubits)
+            for site, value in values:
+                ordered[measured[site]] = bool(value)
+
+            distribution[tuple(ordered)] = np.trace(environment).real
+
+        return distribution
+
+    #same as DenseState.probabilities, in a single sweep from the right end of the chain
+    def probabilities(self, qubits):
+        if not qubits:
+            return []
+
+        sites = [self.sites[qubit] for qubit in qubits]
+        site_probabilities = {}
+
+        environment = np.ones((1, 1), dtype=complex)
+        for site in range(self.num_qubits - 1, min(sites) - 1, -1):
+            tensor = self.tensors[site]
+
+            #same as _distribution, without branching
+            partial = np.einsum(
+                'apb,bd,cpd->pac', tensor, environment, tensor.conj())
+
+            site_probabilities[site] = float(np.trace(partial[1]).real)
+            environment = partial[0] + partial[1]
+
+        return [site_probabilities[site] for site in sites]
+
+    #keep only the components of the state where the qubits hold one of the accepted values
+    def _project(self, qubits, accepted):
+        order = sorted(range(len(qubits)), key=lambda j: self.sites[qubits[j]])
+        first = self.sites[qubits[order[0]]]
+        last = self.sites[qubits[order[-1]]]
+
+        #the projector as a diagonal matrix product operator, the bond
+        #holds the accepted values of the qubits already passed (a prefix tree)
+        prefixes = [{(): 0}]
+        for depth in range(1, len(order) + 1):
+            level = {}
+            for values in accepted:
+                prefix = tuple(values[j] for j in order[:depth])
+                level.setdefault(prefix, len(level))
+
+            prefixes.append(level)
+
+        #every accepted value ends in the same node
+        prefixes[-1] = {prefix: 0 for prefix in prefixes[-1]}
+
+        mpo = []
+        depth = 0
+
+        for site in range(first, last + 1):
+            left_level = prefixes[depth]
+
+            if depth < len(order) and site == self.sites[qubits[order[depth]]]:
+                right_level = prefixes[depth + 1]
+                operator = np.zeros((len(set(left_level.values())),
+                                     len(set(right_level.values())), 2, 2))
+
+                for prefix, node in right_level.items():
+                    value = int(prefix[-1])
+                    operator[left_level[prefix[:-1]], node, value, value] = 1
+
+                depth += 1
+            else:
+                bond = len(set(left_level.values()))
+                operator = np.einsum('lr,oi->lroi', np.eye(bond), np.eye(2))
+
+            mpo.append(operator)
+
+        self._apply_mpo(first, mpo)
+        self._compress()
+
+    #measure the qubits, returns a list of bools in the same order
+    def measure(self, qubits):
+        return list(self.measure_outcome(qubits, lambda *values: values))
+
+    #same as DenseState.measure_outcome
+    def measure_outcome(self, qubits, key):
+        if not qubits:
+            return key()
+
+        distribution = self._distribution(qubits)
+
+        probabilities = {}
+        for values, probability in distribution.items():
+            outcome = key(*values)
+            probabilities[outcome] = probabilities.get(outcome, 0) + probability
+
+        outcomes = list(probabilities.keys())
+        index = sutils.sample(
+            self.rng, np.array([probabilities[outcome] for outcome in outcomes]))
+
+        outcome = outcomes[index]
+
+        #nothing to project if every possible value gives the same outcome
+        if len(outcomes) > 1:
+            self._project(qubits, [
+                values for values in distribution if key(*values) == outcome])
+
+        return outcome
+
+    #same as DenseState.measure_predicate
+    def measure_predicate(self, qubits, predicate):
+        return self.measure_outcome(
+            qubits, lambda *values: bool(predicate(*values)))
@@ -1,611 +1,417 @@
-import itertools
+import copy
+
+import numpy as np
 
 from qiskit import *
+from qiskit.circuit.library import XGate
+from qiskit.quantum_info import Statevector
 from . import qutils
 
-from qchess.point import Point
-from qchess.piece import *
-from qchess.pawn import Pawn
+from qchess.piece import NullPiece
+
+from qchess.engines.sampler import Sampler
+from qchess.engines.simulation_engine import SimulationEngine
+
+
+class QiskitEngine(SimulationEngine):
+    utils = qutils
 
-from qchess.engines.base_engine import BaseEngine
+    def __init__(self, qchess, width, height, incremental=True, seed=None):
+        #in incremental mode the simulated state is kept between measurements,
+        #so qcircuit only holds the gates added since the last one
+        self.incremental = incremental
+        self.statevector = None
 
+        #every measurement comes from this generator, so a seed replays the same game
+        generator = np.random.default_rng(seed)
 
-class QiskitEngine(BaseEngine):
-    def __init__(self, qchess, width, height):
-        self.qchess = qchess
-        self.classical_board = qchess.board
-        self.width = width
-        self.height = height
+        #measurements are sampled directly from the statevector
+        #(Aer samples them itself when not incremental)
+        self.rng = Sampler(generator) if incremental else None
 
-        NullPiece.qflag = 0
-        self.qflag_index = 0
+        #seeds of every Aer run when not incremental
+        #(left unseeded unless the game is, so copies of the game don't repeat the same runs)
+        self.simulator_seeds = generator if seed is not None else None
 
-        if width * height > qutils.MAX_QUBIT_MEMORY:
-            print()
-            print('-----------WARNING-----------')
-            print('Maximum number of qubits exceeded')
-            print(
-                'You can still play the game, but the program might crash if the system becomes too entangled')
-            print()
+        super().__init__(qchess, width, height)
 
+    def reset_state(self):
         self.generate_circuit()
 
     def generate_circuit(self):
-        #board main quantum register
-        self.qregister = QuantumRegister(self.width * self.height)
-
         #ancilla qubits used for some intermediate operations
         self.aregister = QuantumRegister(3)
 
         #ancilla qubits used by the mct function in qutils
         self.mct_register = QuantumRegister(6)
 
+        #the board qubits are added one by one when a square needs one
+        #(see map_square), so only the squares in superposition are simulated
+        self.board_registers = []
+
+        #array index of a square -> its qubit
+        #the squares without a qubit hold the value of the classical board
+        self.qubit_table = {}
+
+        #board qubits in |0> not used by any square
+        self.free_qubits = []
+
         #classical bits to collapse each square individually
         self.cregister = ClassicalRegister(self.width * self.height)
 
         #classical bit for other operations
         self.cbit_misc = ClassicalRegister(1)
 
-        self.qcircuit = QuantumCircuit(
-            self.qregister, self.aregister, self.mct_register, self.cregister, self.cbit_misc)
+        self.qcircuit = self.create_empty_circuit()
 
-        #populate the qubits if pieces already exist
-        for i in range(self.width * self.height):
-            if self.qchess.get_piece(i) != NullPiece:
-                self.qcircuit.x(self.qregister[i])
+        #position of every qubit in the statevector
+        self.qubit_indices = {
+            qubit: i for i, qubit in enumerate(self.qcircuit.qubits)}
 
-    def on_add_piece(self, x, y, piece):
-        piece.qflag = 1 << self.qflag_index
-        self.qflag_index += 1
+        #the circuit starts from |0...0> again
+        #(the pieces already on the board get a qubit when they're used)
+        self.statevector = None
 
-        #the value is already |0> (no piece)
-        #since we want to add the piece with 100% probability, we swap to |1>
-        q1 = self.get_qubit(x, y)
-        self.qcircuit.x(q1)
+    def create_empty_circuit(self):
+        return QuantumCircuit(
+            self.aregister, self.mct_register, *self.board_registers, self.cregister, self.cbit_misc)
 
-    def on_pawn_promotion(self, promoted_pawn, pawn):
-        promoted_pawn.qflag = pawn.qflag
+    #add a new board qubit in |0> to the circuit
+    def add_board_qubit(self):
+        register = QuantumRegister(1)
+        self.board_registers.append(register)
+        self.qcircuit.add_register(register)
 
-    def get_qubit(self, x, y):
-        return self.qregister[self.qchess.get_array_index(x, y)]
+        qubit = register[0]
 
-    def get_bit(self, x, y):
-        return self.cregister[self.qchess.get_array_index(x, y)]
+        #new qubits are the most significant ones of the statevector
+        self.qubit_indices[qubit] = len(self.qubit_indices)
 
-    def get_all_entangled_points(self, x, y):
-        points = []
-        qflag = self.classical_board[x][y].qflag
+        return qubit
 
-        if qflag != 0:
-            for i in range(self.width):
-                for j in range(self.height):
-                    if self.classical_board[i][j].qflag & qflag != 0:
-                        points.append(Point(i, j))
+    """
+    Get the qubit of the square with the given array index, taking one
+    from the pool (or adding a new one) and preparing it with the value
+    of the classical board if it doesn't have any.
+    """
+    def map_square(self, index):
+        if index not in self.qubit_table:
+            if self.free_qubits:
+                qubit = self.free_qubits.pop()
+            else:
+                qubit = self.add_board_qubit()
 
-        return points
+            self.qubit_table[index] = qubit
 
-    def entangle_flags(self, qflag1, qflag2):
-        #nullpiece
-        if not qflag1 or not qflag2:
-            return
+            if self.qchess.get_piece(index) != NullPiece:
+                self.qcircuit.x(qubit)
 
-        #already entangled
-        if qflag1 & qflag2 != 0:
-            return
+        return self.qubit_table[index]
 
-        for i in range(self.width * self.height):
-            piece = self.qchess.get_piece(i)
+    """
+    Return the qubit of the square to the pool, leaving it in |0>.
+    value is the value the qubit holds now.
+    """
+    def release_square(self, index, value):
+        qubit = self.qubit_table.pop(index)
 
-            if piece.qflag & qflag1 != 0:
-                piece.qflag |= qflag2
+        if value:
+            self.qcircuit.x(qubit)
 
-            elif piece.qflag & qflag2 != 0:
-                piece.qflag |= qflag1
+        self.free_qubits.append(qubit)
 
-    def entangle_path_flags(self, qflag, source, target):
-        all_qflags = 0
+    """
+    Release the qubits of the squares with the given array indices,
+    which the classical board must know the value of.
+    """
+    def release_known_squares(self, indices):
+        for i in indices:
+            if i in self.qubit_table:
+                #the qubit holds the board value, unless its flip is pending
+                occupied = self.qchess.get_piece(i) != NullPiece
+                self.release_square(i, occupied != (i in self.pending_flips))
 
-        pieces = self.qchess.get_path_pieces(source, target)
+            #the square follows the classical board now
+            self.pending_flips.discard(i)
 
-        for piece in pieces:
-            all_qflags |= piece.qflag
+    def fork(self, qchess):
+        engine = super().fork(qchess)
 
-        self.entangle_flags(all_qflags, qflag)
+        #statevectors are never changed in place, so only the circuit is copied
+        engine.qcircuit = self.qcircuit.copy()
+        engine.board_registers = list(self.board_registers)
+        engine.qubit_table = dict(self.qubit_table)
+        engine.free_qubits = list(self.free_qubits)
+        engine.qubit_indices = dict(self.qubit_indices)
 
-        return bool(pieces)
+        if self.simulator_seeds is not None:
+            engine.simulator_seeds = copy.deepcopy(self.simulator_seeds)
 
-    def collapse_by_flag(self, qflag, collapse_all=False):
-        #nullpiece
-        if not qflag and not collapse_all:
-            return
+        return engine
 
-        collapsed_indices = []
+    def get_options(self):
+        return {'incremental': self.incremental}
 
-        for i in range(self.width * self.height):
-            piece = self.qchess.get_piece(i)
+    def save_state(self):
+        #the circuit itself can't be restored without running it again
+        if not self.incremental:
+            raise NotImplementedError('Only the incremental mode can be saved')
 
-            if (
-                not piece.collapsed and
-                piece != NullPiece and (
-                    collapse_all or piece.qflag & qflag != 0)
-            ):
-                #measure the ith qubit to the ith bit
-                self.qcircuit.measure(self.qregister[i], self.cregister[i])
-                collapsed_indices.append(i)
+        self.update_statevector()
 
-        if collapsed_indices:
-            job = execute(self.qcircuit, backend=qutils.backend, shots=1)
-            result = job.result()
+        info, arrays = super().save_state()
 
-            bitstring = list(result.get_counts().keys())[0].split(' ')[1]
+        #board qubits by their position in board_registers
+        positions = {register[0]: i for i, register in enumerate(self.board_registers)}
 
-            for i, char in enumerate(bitstring[::-1]):
-                pos = self.qchess.get_board_point(i)
+        info['num_board_qubits'] = len(self.board_registers)
+        info['qubit_table'] = [
+            [index, positions[qubit]] for index, qubit in self.qubit_table.items()]
+        info['free_qubits'] = [positions[qubit] for qubit in self.free_qubits]
 
-                if char == '0' and i in collapsed_indices:
-                    self.classical_board[pos.x][pos.y] = NullPiece
+        if self.statevector is not None:
+            arrays['statevector'] = self.statevector.data
 
-                    #set to |0> in circuit
-                    self.qcircuit.reset(self.qregister[i])
+        return info, arrays
 
-                if char == '1' and i in collapsed_indices:
-                    #set to |1> in circuit
-                    self.qcircuit.reset(self.qregister[i])
-                    self.qcircuit.x(self.qregister[i])
+    def load_state(self, info, arrays):
+        if not self.incremental:
+            raise NotImplementedError('Only the incremental mode can be loaded')
 
-                    piece = self.qchess.get_piece(i)
-                    assert(piece != NullPiece)
-                    piece.collapsed = True
+        super().load_state(info, arrays)
 
-                    #since we can't be 100% sure of the original qflag of a piece
-                    #we assign them at random from the qflag used to collapse
-                    #(note: binary qflag has as many '1's as the number of collapsed pieces)
+        self.generate_circuit()
 
-                    if not collapse_all:
-                        #find the position of the first '1' in binary qflag
-                        binary_qflag = bin(qflag)[2:]
-                        index = len(binary_qflag) - binary_qflag.find('1') - 1
+        qubits = [self.add_board_qubit() for i in range(info['num_board_qubits'])]
 
-                        #there should always be enough '1's for every collapsed piece
-                        assert(index < len(bin(qflag)))
+        self.qubit_table = {index: qubits[position] for index, position in info['qubit_table']}
+        self.free_qubits = [qubits[position] for position in info['free_qubits']]
 
-                        #generate a new qflag with all '0's except a '1' in that position
-                        new_qflag = 1 << index
+        if 'statevector' in arrays:
+            self.statevector = Statevector(np.asarray(arrays['statevector']))
 
-                        #remove the '1' in that position from binary qflag
-                        qflag ^= new_qflag
+    def run_circuit(self):
+        seed = None
+        if self.simulator_seeds is not None:
+            seed = int(self.simulator_seeds.integers(2 ** 31))
 
-                        #assign new original qflag
-                        piece.qflag = new_qflag
+        job = execute(self.qcircuit, backend=qutils.backend,
+                      shots=1, seed_simulator=seed)
+        return job.result()
 
-        #assign new qflags to all the pieces
-        if collapse_all:
-            self.qflag_index = 0
+    #apply the gates added since the last measurement to the statevector
+    def update_statevector(self):
+        if self.statevector is None:
+            self.statevector = Statevector.from_label(
+                '0' * self.qcircuit.num_qubits)
 
-            for i in range(self.height * self.width):
-                piece = self.qchess.get_piece(i)
-                if piece == NullPiece:
-                    continue
+        #board qubits added since the last update start as |0>
+        missing = self.qcircuit.num_qubits - self.statevector.num_qubits
+        if missing:
+            self.statevector = self.statevector.expand(
+                Statevector.from_label('0' * missing))
 
-                piece.qflag = 1 << self.qflag_index
-                self.qflag_index += 1
+        for instruction, qargs, cargs in self.qcircuit.data:
+            indices = [self.qubit_indices[qubit] for qubit in qargs]
 
-        all_collapsed = collapse_all
+            if instruction.name == 'reset':
+                #a reset is a measurement followed by X if the result is |1>
+                if self.sample_qubits(indices)[0]:
+                    self.statevector = self.statevector.evolve(
+                        XGate(), qargs=indices)
+            else:
+                self.statevector = self.statevector.evolve(
+                    instruction, qargs=indices)
 
-        if not all_collapsed:
-            all_collapsed = True
+        self.qcircuit = self.create_empty_circuit()
 
-            for i in range(self.width * self.height):
-                if not self.qchess.get_piece(i).collapsed:
-                    all_collapsed = False
-                    break
+    """
+    Draw one sample from the marginal distribution of the qubits
+    (statevector indices) and project the statevector in place.
+    Returns a list of bools in the same order.
+    """
+    def sample_qubits(self, indices):
+        values = self.sample_values(indices)
+        self.project_qubits(indices, values)
 
-        #the circuit is reset when all pieces are collapsed, even if
-        #no new pieces were collapsed in this call
-        #when all the qubits are |0> or |1>, it's cheaper to just reset
-        #the circuit than to keep track of all the qubits operations
-        if all_collapsed:
-            self.generate_circuit()
+        return values
 
-    def set_piece_uncollapsed(self, point):
-        if self.classical_board[point.x][point.y] != NullPiece:
-            self.classical_board[point.x][point.y].collapsed = False
+    #draw one sample of the qubits without projecting the statevector
+    def sample_values(self, indices):
+        probabilities = self.statevector.probabilities(indices)
 
-    def collapse_path(self, source, target, collapse_target=False, collapse_source=False):
-        qflag = 0
+        #remove rounding errors
+        probabilities[probabilities < 1e-10] = 0
+        probabilities /= probabilities.sum()
 
-        for piece in self.qchess.get_path_pieces(source, target):
-            qflag |= piece.qflag
+        outcome = int(self.rng.choice(len(probabilities), p=probabilities))
+        return [bool(outcome >> j & 1) for j in range(len(indices))]
 
-        source_piece = self.classical_board[source.x][source.y]
-        if source_piece != NullPiece and collapse_source:
-            #force the piece to get collapsed
-            source_piece.collapsed = False
+    #project the statevector to the qubits holding the values
+    def project_qubits(self, indices, values):
+        #qubit i is the bit i of the amplitude index, so it's the axis n - 1 - i
+        num_qubits = self.statevector.num_qubits
+        data = self.statevector.data.reshape((2,) * num_qubits).copy()
 
-            qflag |= source_piece.qflag
+        for index, value in zip(indices, values):
+            axes = [slice(None)] * num_qubits
+            axes[num_qubits - 1 - index] = int(not value)
+            data[tuple(axes)] = 0
 
-        target_piece = self.classical_board[target.x][target.y]
-        if target_piece != NullPiece and collapse_source:
-            #force the piece to get collapsed
-            target_piece.collapsed = False
+        data = data.reshape(-1) / np.linalg.norm(data)
+        self.statevector = Statevector(data)
 
-            qflag |= target_piece.qflag
+    #measure the qubits in incremental mode, returns a list of bools
+    def measure_qubits(self, qubits):
+        self.update_statevector()
 
-        self.collapse_by_flag(qflag)
+        return self.sample_qubits([self.qubit_indices[qubit] for qubit in qubits])
 
-        #return true if path is clear after collapse
-        return not bool(self.qchess.get_path_pieces(source, target))
+    """
+    Rebuild qcircuit with only the operations that can still affect the
+    squares in superposition (their backward light cone), and prepare the
+    rest of the squares directly as |0> or |1> from the classical board.
+    """
+    def compact_state(self):
+        known_squares = [
+            i for i in range(self.width * self.height) if self.qchess.get_piece(i).collapsed]
 
-    def collapse_point(self, x, y):
-        self.collapse_by_flag(self.classical_board[x][y].qflag)
+        #in incremental mode the history is already part of the statevector
+        if self.incremental:
+            self.release_known_squares(known_squares)
+            return
 
-    def collapse_all(self):
-        self.collapse_by_flag(None, collapse_all=True)
+        live_qubits = set()
+        for i in range(self.width * self.height):
+            if not self.qchess.get_piece(i).collapsed:
+                live_qubits.add(self.qubit_table[i])
 
-    """
-        The idea of this function is to calculate all posible permutations
-        of the pieces entangled with target to see if, in any of the combinations,
-        target is not empty and the path is blocked at the same time. This
-        would violate double occupancy so a measurement has to be performed.
-    """
+        cone = set(live_qubits)
+        needed_clbits = set()
+        kept = []
 
-    def does_slide_violate_double_occupancy(self, source, target):
-        target_piece = self.classical_board[target.x][target.y]
+        for instruction, qargs, cargs in reversed(self.qcircuit.data):
+            if not (
+                any(qubit in cone for qubit in qargs) or
+                any(clbit in needed_clbits for clbit in cargs)
+            ):
+                continue
 
-        if target_piece == NullPiece:
-            #target is always empty
-            return False
+            kept.append((instruction, qargs, cargs))
 
-        entangled_points = []
-        path = self.qchess.get_path_points(source, target)
+            #what happened to a qubit before a reset doesn't matter,
+            #unless an older kept operation adds it to the cone again
+            if instruction.name == 'reset':
+                cone.difference_update(qargs)
+            else:
+                cone.update(qargs)
 
-        for i in range(self.width * self.height):
-            point = self.qchess.get_board_point(i)
+            needed_clbits.difference_update(cargs)
 
-            if self.classical_board[point.x][point.y].qflag & target_piece.qflag != 0:
-                entangled_points.append(point)
+            #the measurement that sets the condition must be kept too
+            if instruction.condition:
+                needed_clbits.update(instruction.condition[0])
 
-        #if a piece is blocking the path independently of the entanglement
-        #of target, then DO is violated
-        for point in path:
-            if self.classical_board[point.x][point.y] != NullPiece and not point in entangled_points:
-                return True
+        touched_qubits = set()
+        for instruction, qargs, cargs in kept:
+            touched_qubits.update(qargs)
 
-        #the number of pieces is the number of 1s in the target qflag
-        number_of_pieces = list(bin(target_piece.qflag)).count('1')
+        self.qcircuit = self.create_empty_circuit()
 
-        assert(len(entangled_points) >= number_of_pieces)
+        for instruction, qargs, cargs in reversed(kept):
+            self.qcircuit.append(instruction, qargs, cargs)
 
-        #contains 1 for each piece and the rest are zeroes (empty squares)
-        permutations = [1] * number_of_pieces + [0] * \
-            (len(entangled_points) - number_of_pieces)
+        #the other board qubits that interacted with them are reset,
+        #and their squares follow the classical board again
+        for register in self.board_registers:
+            qubit = register[0]
 
-        #unique permutations of number of pieces in all points
-        permutations = set(list(itertools.permutations(permutations)))
+            if qubit in touched_qubits and qubit not in live_qubits:
+                self.qcircuit.reset(qubit)
 
-        for perm in permutations:
-            blocked = False
-            target_empty = True
+        for i in known_squares:
+            if i in self.qubit_table:
+                self.free_qubits.append(self.qubit_table.pop(i))
 
-            #entangled_points and all permutations have the same length
-            #so they correspond to the same point for the same index
-            for i, point in enumerate(entangled_points):
-                if point in path and perm[i] == 1:
-                    blocked = True
+        self.pending_flips.clear()
 
-                if point == target and perm[i] == 1:
-                    target_empty = False
+    def get_qubit(self, x, y):
+        return self.get_square_qubit(self.qchess.get_array_index(x, y))
 
-            if blocked and not target_empty:
-                return True
+    #get the qubit of the square with the given array index, ready to be used
+    def get_square_qubit(self, index):
+        self.apply_pending_flip(index)
 
-        return False
+        return self.map_square(index)
 
-    def standard_move(self, source, target, force=False):
-        piece = self.classical_board[source.x][source.y]
+    def get_bit(self, x, y):
+        return self.cregister[self.qchess.get_array_index(x, y)]
 
-        if not force and piece.type == PieceType.PAWN:
-            return self._standard_pawn_move(source, target)
+    def prepare_piece(self, x, y):
+        index = self.qchess.get_array_index(x, y)
 
-        target_piece = self.classical_board[target.x][target.y]
+        #the squares without a qubit already hold the new piece
+        if index in self.qubit_table:
+            self.qcircuit.x(self.get_square_qubit(index))
 
-        if target_piece == NullPiece or target_piece == piece:
-            if piece.is_move_slide():
-                if self.entangle_path_flags(piece.qflag, source, target):
-                    piece.collapsed = False
+    def flip_square(self, index):
+        self.qcircuit.x(self.map_square(index))
 
-                    #if something may be blocking then the piece might stay in place
-                    #so we don't want to remove it clasically
-                    if target_piece == NullPiece:
-                        target_piece = piece
+    def move_classically(self, source, target):
+        super().move_classically(source, target)
 
-                qutils.perform_standard_slide(self, source, target)
-            else:
-                qutils.perform_standard_jump(self, source, target)
-
-            self.classical_board[source.x][source.y] = target_piece.copy()
-            self.classical_board[target.x][target.y] = piece.copy()
-        else:
-            if target_piece.color == piece.color:
-                self.collapse_by_flag(target_piece.qflag)
-
-                if (
-                    self.classical_board[source.x][source.y] != NullPiece and
-                    self.classical_board[target.x][target.y] == NullPiece
-                ):
-                    new_source_piece = NullPiece
-
-                    if piece.is_move_slide():
-                        if self.entangle_path_flags(piece.qflag, source, target):
-                            #if something may be blocking then the piece might stay in place
-                            #so we don't want to remove it clasically
-                            piece.collapsed = False
-                            new_source_piece = piece
-
-                        qutils.perform_standard_slide(self, source, target)
-                    else:
-                        qutils.perform_standard_jump(self, source, target)
-
-                    self.classical_board[source.x][source.y] = new_source_piece.copy(
-                    )
-                    self.classical_board[target.x][target.y] = piece.copy()
-            else:
-                self.collapse_by_flag(piece.qflag)
-
-                if self.classical_board[source.x][source.y] != NullPiece:
-                    path_empty = self.qchess.is_path_empty(source, target)
-
-                    #if the path is empty the move is just a jump
-                    if piece.is_move_slide() and not path_empty:
-                        """
-                            Afer qutils.perform_capture_slide the path is collapsed
-                            already unless does_slide_violate_double_occupancy returns 0,
-                            in which case entanglement occurs.
-                            We call collapse_path to update the classical board.
-                        """
-                        if qutils.perform_capture_slide(self, source, target):
-                            if self.does_slide_violate_double_occupancy(source, target):
-                                path_clear = self.collapse_path(
-                                    source, target, collapse_source=True)
-
-                                if path_clear and self.classical_board[source.x][source.y] == NullPiece:
-                                    self.classical_board[target.x][target.y] = piece.copy(
-                                    )
-                            else:
-                                if not self.entangle_path_flags(piece.qflag, source, target):
-                                    self.classical_board[source.x][source.y] = NullPiece
-                                else:
-                                    piece.collapsed = False
-
-                                self.classical_board[target.x][target.y] = piece.copy(
-                                )
-                        else:
-                            path_clear = self.collapse_path(
-                                source, target, collapse_source=True)
-
-                            if path_clear and self.classical_board[source.x][source.y] == NullPiece:
-                                self.classical_board[target.x][target.y] = piece.copy(
-                                )
-                    else:
-                        qutils.perform_capture_jump(self, source, target)
-
-                        self.classical_board[source.x][source.y] = NullPiece
-                        self.classical_board[target.x][target.y] = piece.copy()
-
-    def _standard_pawn_move(self, source, target):
-        pawn = self.classical_board[source.x][source.y]
-        target_piece = self.classical_board[target.x][target.y]
-
-        move_type, ep_point = pawn.is_move_valid(
-            source, target, qchess=self.qchess)
-
-        #this is checked in QChess class
-        assert(move_type != Pawn.MoveType.INVALID)
-
-        if (
-            move_type == Pawn.MoveType.SINGLE_STEP or
-            move_type == Pawn.MoveType.DOUBLE_STEP
-        ):
-            self.collapse_by_flag(target_piece.qflag)
-
-            if (
-                self.classical_board[source.x][source.y] != NullPiece and
-                self.classical_board[target.x][target.y] == NullPiece
-            ):
-                if move_type == Pawn.MoveType.SINGLE_STEP:
-                    qutils.perform_standard_jump(self, source, target)
+        self.release_known_squares([
+            self.qchess.get_array_index(source.x, source.y),
+            self.qchess.get_array_index(target.x, target.y)])
 
-                    self.classical_board[source.x][source.y] = NullPiece
-                else:
-                    if not self.entangle_path_flags(pawn.qflag, source, target):
-                        self.classical_board[source.x][source.y] = NullPiece
-                    else:
-                        pawn.collapsed = False
+    def get_square_probabilities(self, indices):
+        if not self.incremental:
+            raise NotImplementedError(
+                'Occupancy probabilities need the statevector of the incremental mode')
 
-                    qutils.perform_standard_slide(self, source, target)
+        self.update_statevector()
 
-                self.classical_board[target.x][target.y] = pawn.copy()
+        #a single pass over the amplitudes, qubit k is the axis num_qubits - 1 - k
+        num_qubits = self.statevector.num_qubits
+        view = (np.abs(self.statevector.data) ** 2).reshape((2,) * num_qubits)
 
-        elif move_type == Pawn.MoveType.CAPTURE:
-            #pawn is the only piece that needs to collapse target when capturing
-            #because it can't move diagonally unless capturing
-            self.collapse_by_flag(pawn.qflag | target_piece.qflag)
+        probabilities = []
+        for i in indices:
+            axis = num_qubits - 1 - self.qubit_indices[self.qubit_table[i]]
+            probabilities.append(float(np.sum(np.take(view, 1, axis=axis))))
 
-            if (
-                self.classical_board[source.x][source.y] != NullPiece and
-                self.classical_board[target.x][target.y] != NullPiece
-            ):
-                qutils.perform_capture_jump(self, source, target)
+        return probabilities
 
-                self.classical_board[source.x][source.y] = NullPiece
-                self.classical_board[target.x][target.y] = pawn.copy()
+    def measure_squares(self, indices):
+        #squares measured together with an earlier measurement of the move
+        values = self.take_premeasured(indices)
 
-        elif move_type == Pawn.MoveType.EN_PASSANT:
-            if target_piece == NullPiece:
-                qutils.perform_standard_en_passant(
-                    self, source, target, ep_point)
+        if self.incremental:
+            if values is None:
+                values = self.measure_qubits(
+                    [self.get_square_qubit(i) for i in indices])
 
-                self.classical_board[source.x][source.y] = NullPiece
-                self.classical_board[target.x][target.y] = pawn
-                self.classical_board[ep_point.x][ep_point.y] = NullPiece
+            #otherwise the statevector was already projected
 
-            elif target_piece.color == pawn.color:
-                self.collapse_by_flag(target_piece.qflag)
+            #the squares are known now, so they don't need a qubit
+            for i, value in zip(indices, values):
+                self.release_square(i, value)
 
-                if self.classical_board[target.x][target.y] == NullPiece:
-                    qutils.perform_standard_en_passant(
-                        self, source, target, ep_point)
+            return values
 
-                    self.classical_board[source.x][source.y] = NullPiece
-                    self.classical_board[target.x][target.y] = pawn.copy()
-                    self.classical_board[ep_point.x][ep_point.y] = NullPiece
-            else:
-                self.collapse_by_flag(pawn.qflag)
-
-                if self.classical_board[source.x][source.y] != NullPiece:
-                    qutils.perform_capture_en_passant(
-                        self, source, target, ep_point)
-
-                    self.classical_board[source.x][source.y] = NullPiece
-                    self.classical_board[target.x][target.y] = pawn.copy()
-                    self.classical_board[ep_point.x][ep_point.y] = NullPiece
-
-    def split_move(self, source, target1, target2):
-        piece = self.classical_board[source.x][source.y]
-        target_piece1 = self.classical_board[target1.x][target1.y]
-        target_piece2 = self.classical_board[target2.x][target2.y]
-
-        #the source piece is always swapped with the target2
-        #so unless the path is blocked we know what piece target2 has
-        new_source_piece = target_piece2
-
-        if piece.is_move_slide():
-            qutils.perform_split_slide(self, source, target1, target2)
-
-            path1_blocked = self.entangle_path_flags(
-                piece.qflag, source, target1)
-            path2_blocked = self.entangle_path_flags(
-                piece.qflag, source, target2)
-
-            #set the source piece to null if any of the paths is not blocked,
-            #since the piece will always slide through that one if the other is blocked
-            if path1_blocked and path2_blocked and new_source_piece == NullPiece:
-                new_source_piece = piece
-                new_source_piece.collapsed = False
-        else:
-            qutils.perform_split_jump(self, source, target1, target2)
-
-        if not piece.collapsed or not target_piece1.collapsed:
-            #entangle only the pieces affected by iSwap_sqrt
-            self.entangle_flags(piece.qflag, target_piece1.qflag)
-
-        if target_piece1 == NullPiece:
-            self.classical_board[target1.x][target1.y] = piece.copy()
-
-        self.classical_board[target2.x][target2.y] = piece.copy()
-        self.classical_board[source.x][source.y] = new_source_piece.copy()
-
-        #only uncollapse the pieces if state |t1, t2> is not |00> or |11>
-        #because iSwap_sqrt leaves these states untouched
-        if target_piece1 == NullPiece:
-            self.set_piece_uncollapsed(target1)
-            self.set_piece_uncollapsed(target2)
-
-    def merge_move(self, source1, source2, target):
-        piece1 = self.classical_board[source1.x][source1.y]
-        piece2 = self.classical_board[source2.x][source2.y]
-        target_piece = self.classical_board[target.x][target.y]
-
-        #the target piece is always swapped with the source2
-        #so unless the path is blocked we know what piece source2 has
-        new_source2_piece = target_piece
-
-        if piece1.is_move_slide():
-            qutils.perform_merge_slide(self, source1, source2, target)
-
-            self.entangle_path_flags(piece1.qflag, source1, target)
-            path2_blocked = self.entangle_path_flags(
-                piece2.qflag, source2, target)
-
-            if path2_blocked and new_source2_piece == NullPiece:
-                new_source2_piece = piece1
-                new_source2_piece.collapsed = False
-        else:
-            qutils.perform_merge_jump(self, source1, source2, target)
-
-        if not piece1.collapsed or not piece2.collapsed:
-            #entangle only the pieces affected by iSwap_sqrt
-            self.entangle_flags(piece1.qflag, piece2.qflag)
-
-        if target_piece == NullPiece:
-            self.classical_board[target.x][target.y] = piece1.copy()
-
-        self.classical_board[source1.x][source1.y] = piece2.copy()
-        self.classical_board[source2.x][source2.y] = new_source2_piece.copy()
-
-        if target_piece == NullPiece:
-            self.set_piece_uncollapsed(source1)
-            self.set_piece_uncollapsed(target)
-
-    def castling_move(self, king_source, rook_source, king_target, rook_target):
-        king = self.classical_board[king_source.x][king_source.y]
-        rook = self.classical_board[rook_source.x][rook_source.y]
-
-        king_target_piece = self.classical_board[king_target.x][king_target.y]
-        rook_target_piece = self.classical_board[rook_target.x][rook_target.y]
-
-        #collapse target pieces
-        self.collapse_by_flag(king_target_piece.qflag |
-                              rook_target_piece.qflag)
-
-        #if both targets are empty
-        if (
-            self.classical_board[king_target.x][king_target.y] == NullPiece and
-            self.classical_board[rook_target.x][rook_target.y] == NullPiece
-        ):
-            #the path doesn't neccesarily have to be the shortest straight path
-            #between king and rook
-            king_path = self.qchess.get_path_points(king_source, king_target)
-            rook_path = self.qchess.get_path_points(rook_source, rook_target)
-
-            # in general it's the unique combination of their paths
-            path = []
-            for point in king_path + rook_path:
-                if point == king_target or point == rook_target:
-                    continue
-
-                #we don't need to include empty squares
-                if self.classical_board[point.x][point.y] == NullPiece:
-                    continue
-
-                if not point in path:
-                    path.append(point)
-
-            #exclude king_target and rook_target just in case
-            if king_target in path:
-                path.remove(king_target)
-            if rook_target in path:
-                path.remove(rook_target)
-
-            #perform the quantum move
-            qutils.perform_castle(
-                self, king_source, rook_source, king_target, rook_target, path)
-
-            if not path:
-                #remove from source only if path is empty
-                self.classical_board[king_source.x][king_source.y] = NullPiece
-                self.classical_board[rook_source.x][rook_source.y] = NullPiece
-            else:
-                #entangle with all the pieces in the path
-                path_qflags = 0
-                for point in path:
-                    path_qflags |= self.classical_board[point.x][point.y].qflag
+        if values is None:
+            for i in indices:
+                #measure the ith qubit to the ith bit
+                self.qcircuit.measure(self.get_square_qubit(i), self.cregister[i])
+
+            result = self.run_circuit()
 
-                self.entangle_flags(king.qflag, rook.qflag)
-                self.entangle_flags(path_qflags, king.qflag)
+            bitstring = list(result.get_counts().keys())[0].split(' ')[1][::-1]
+            values = [bitstring[i] == '1' for i in indices]
 
-                king.collapsed = False
-                rook.collapsed = False
+        for i in indices:
+            #the squares are known now, so they don't need a qubit
+            self.qcircuit.reset(self.get_square_qubit(i))
+            self.release_square(i, False)
 
-            self.classical_board[king_target.x][king_target.y] = king.copy()
-            self.classical_board[rook_target.x][rook_target.y] = rook.copy()
+        return values
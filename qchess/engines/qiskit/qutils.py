@@ -1,61 +1,72 @@
 import math
 
-from qiskit import QuantumCircuit, QuantumRegister
-from qiskit.quantum_info.operators import Operator
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import iSwapGate
 from qiskit import Aer
-from qiskit import execute
-from qiskit.tools.visualization import plot_histogram
+from qiskit import transpile
 
 backend = Aer.get_backend('qasm_simulator')
 
 MAX_QUBIT_MEMORY = backend.MAX_QUBIT_MEMORY
 
-b = math.sqrt(2)
+"""
+The iSwap family is defined from native gates instead of dense unitaries,
+so the simulator can transpile and fuse them like any other gate.
+The definitions (and their controlled versions) are built only once.
+"""
+
+iSwap = iSwapGate()
+
+
+def _create_iswap_sqrt():
+    #iSwap = exp(i*pi/4*(XX + YY)), so its square root is exp(i*pi/8*(XX + YY))
+    definition = QuantumCircuit(2, name='iSwap_sqrt')
+    definition.rxx(-math.pi/4, 0, 1)
+    definition.ryy(-math.pi/4, 0, 1)
 
-iSwap = Operator([
-    [1, 0, 0, 0],
-    [0, 0, 1j, 0],
-    [0, 1j, 0, 0],
-    [0, 0, 0, 1],
-])
+    return definition.to_gate()
 
-#when the controlled qubit holds if a path is clear
+
+iSwap_sqrt = _create_iswap_sqrt()
+
+#the control is the first qubit and the gate is applied when it's |0>
+#when the control qubit holds if a path is blocked
 #then this gate can be understood as the slide gate
-iSwap_controlled = Operator([
-    [1, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 1j, 0, 0, 0, 0, 0],
-    [0, 1j, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 1, 0, 0, 0, 0],
-    [0, 0, 0, 0, 1, 0, 0, 0],
-    [0, 0, 0, 0, 0, 1, 0, 0],
-    [0, 0, 0, 0, 0, 0, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 1],
-])
-
-iSwap_sqrt = Operator([
-    [1, 0, 0, 0],
-    [0, 1/b, 1j/b, 0],
-    [0, 1j/b, 1/b, 0],
-    [0, 0, 0, 1],
-])
-
-#in base s, t control
-iSwap_sqrt_controlled = Operator([
-    [1, 0, 0, 0, 0, 0, 0, 0],
-    [0, 1/b, 1j/b, 0, 0, 0, 0, 0],
-    [0, 1j/b, 1/b, 0, 0, 0, 0, 0],
-    [0, 0, 0, 1, 0, 0, 0, 0],
-    [0, 0, 0, 0, 1, 0, 0, 0],
-    [0, 0, 0, 0, 0, 1, 0, 0],
-    [0, 0, 0, 0, 0, 0, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 1],
-])
+iSwap_controlled = iSwap.control(1, ctrl_state=0)
+
+iSwap_sqrt_controlled = iSwap_sqrt.control(1, ctrl_state=0)
+
+"""
+The transpiler can't unroll a conditioned gate with a custom definition
+(the condition register is lost), so conditioned gates are appended
+already decomposed into basis gates, each one with the condition.
+"""
+
+
+_decompositions = {}
+
+
+def _append_conditioned(engine, gate, qubits, register, value):
+    if gate.name not in _decompositions:
+        definition = QuantumCircuit(gate.num_qubits)
+        definition.append(gate, definition.qubits)
+        _decompositions[gate.name] = transpile(
+            definition, basis_gates=backend.configuration().basis_gates)
+
+    definition = _decompositions[gate.name]
+
+    for instruction, qargs, cargs in definition.data:
+        mapped_qubits = [qubits[definition.qubits.index(qubit)] for qubit in qargs]
+
+        #c_if sets the condition on the instruction itself, so it's copied
+        engine.qcircuit.append(
+            instruction.copy(), mapped_qubits).c_if(register, value)
 
 def perform_standard_jump(engine, source, target):
     qsource = engine.get_qubit(source.x, source.y)
     qtarget = engine.get_qubit(target.x, target.y)
 
-    engine.qcircuit.unitary(iSwap, [qsource, qtarget], label="iSwap")
+    engine.qcircuit.append(iSwap, [qsource, qtarget])
 
 def perform_capture_jump(engine, source, target):
     qsource = engine.get_qubit(source.x, source.y)
@@ -65,8 +76,8 @@ def perform_capture_jump(engine, source, target):
     captured_piece = engine.aregister[0]
     engine.qcircuit.reset(captured_piece)
 
-    engine.qcircuit.unitary(iSwap, [qtarget, captured_piece], label='iSwap')
-    engine.qcircuit.unitary(iSwap, [qsource, qtarget], label='iSwap')
+    engine.qcircuit.append(iSwap, [qtarget, captured_piece])
+    engine.qcircuit.append(iSwap, [qsource, qtarget])
 
 
 def perform_split_jump(engine, source, target1, target2):
@@ -74,9 +85,8 @@ def perform_split_jump(engine, source, target1, target2):
     qtarget1 = engine.get_qubit(target1.x, target1.y)
     qtarget2 = engine.get_qubit(target2.x, target2.y)
 
-    engine.qcircuit.unitary(
-        iSwap_sqrt, [qtarget1, qsource], label='iSwap_sqrt')
-    engine.qcircuit.unitary(iSwap, [qsource, qtarget2], label='iSwap')
+    engine.qcircuit.append(iSwap_sqrt, [qtarget1, qsource])
+    engine.qcircuit.append(iSwap, [qsource, qtarget2])
 
 
 def perform_merge_jump(engine, source1, source2, target):
@@ -84,31 +94,139 @@ def perform_merge_jump(engine, source1, source2, target):
     qsource2 = engine.get_qubit(source2.x, source2.y)
     qtarget = engine.get_qubit(target.x, target.y)
 
-    engine.qcircuit.unitary(iSwap, [qtarget, qsource2], label='iSwap')
-    engine.qcircuit.unitary(
-        iSwap_sqrt, [qsource1, qtarget], label='iSwap_sqrt')
+    engine.qcircuit.append(iSwap, [qtarget, qsource2])
+    engine.qcircuit.append(iSwap_sqrt, [qsource1, qtarget])
 
 
-def perform_standard_slide(engine, source, target):
-    control_qubits = []
+"""
+Every slide, en passant and castling builds the same gates for the same
+move kind and path length(s), only on different qubits. So each sequence
+is built and transpiled once as a template circuit and then composed
+onto the qubits of the move.
+The qubits of a template are laid out as
+    [path qubits of every path..., move squares..., aregister..., mct_register...]
+with a qubit that appears more than once (a square shared by two paths)
+only kept the first time.
+"""
+
+_templates = {}
+
+
+def _get_template(builder, path_lengths, layout, num_wires):
+    key = (builder.__name__, path_lengths, layout)
+
+    if key not in _templates:
+        circuit = QuantumCircuit(num_wires + 3 + 6)
+
+        #paths can share squares with each other and with the move squares,
+        #so layout gives the wire of every one of them
+        qubits = [circuit.qubits[wire] for wire in layout]
+
+        paths = []
+        for length in path_lengths:
+            paths.append(qubits[:length])
+            qubits = qubits[length:]
+
+        squares = qubits
+        aregister = circuit.qubits[num_wires:num_wires + 3]
+        mct_register = circuit.qubits[num_wires + 3:]
+
+        builder(circuit, paths, squares, aregister, mct_register)
+
+        #optimization level 0 since a template can start at any point of the
+        #circuit, so its resets can't be assumed to act on |0>
+        _templates[key] = transpile(
+            circuit, basis_gates=backend.configuration().basis_gates, optimization_level=0)
 
-    for point in engine.qchess.get_path_points(source, target):
-        control_qubits.append(engine.get_qubit(point.x, point.y))
-        engine.qcircuit.x(engine.get_qubit(point.x, point.y))
+    return _templates[key]
 
+
+def _apply_template(engine, builder, paths, squares):
+    qubits = [qubit for path in paths for qubit in path] + squares
+
+    #every distinct qubit is a single wire of the template
+    wires = list(dict.fromkeys(qubits))
+    layout = tuple(wires.index(qubit) for qubit in qubits)
+
+    template = _get_template(
+        builder, tuple(len(path) for path in paths), layout, len(wires))
+
+    wires += list(engine.aregister) + list(engine.mct_register)
+
+    engine.qcircuit.compose(template, qubits=wires, inplace=True)
+
+
+"""
+Only the squares of the path in superposition are used as controls
+(see SimulationEngine.get_path_controls).
+Returns the control points and True/False if the classical board already
+knows the path is clear/blocked, or None if it depends on the controls.
+"""
+
+
+def _get_path_controls(engine, points):
+    controls = engine.get_path_controls(points)
+
+    if not controls:
+        return controls, True
+
+    #a collapsed piece is only returned alone
+    if engine.classical_board[controls[0].x][controls[0].y].collapsed:
+        return controls, False
+
+    return controls, None
+
+
+def _get_qubits(engine, points):
+    return [engine.get_qubit(point.x, point.y) for point in points]
+
+
+"""
+Flip the ancilla (which must be |1>) to |0> if all the control qubits are empty.
+The controls are left flipped, so the caller must undo the X.
+"""
+
+
+def _compute_path_clear(circuit, control_qubits, path_ancilla, mct_register):
+    for qubit in control_qubits:
+        circuit.x(qubit)
+
+    if control_qubits:
+        circuit.mct(control_qubits, path_ancilla,
+                    mct_register, mode='advanced')
+    else:
+        #an empty path is always clear
+        circuit.x(path_ancilla)
+
+
+def _standard_slide_template(circuit, paths, squares, aregister, mct_register):
+    control_qubits, = paths
+    qsource, qtarget = squares
+
+    path_ancilla = aregister[0]
+    circuit.reset(path_ancilla)
+    circuit.x(path_ancilla)
+
+    _compute_path_clear(circuit, control_qubits, path_ancilla, mct_register)
+    circuit.append(iSwap_controlled, [path_ancilla, qsource, qtarget])
+
+    for qubit in control_qubits:
+        circuit.x(qubit)
+
+
+def perform_standard_slide(engine, source, target):
     qsource = engine.get_qubit(source.x, source.y)
     qtarget = engine.get_qubit(target.x, target.y)
 
-    path_ancilla = engine.aregister[0]
-    engine.qcircuit.reset(path_ancilla)
-    engine.qcircuit.x(path_ancilla)
+    controls, path_clear = _get_path_controls(
+        engine, engine.qchess.get_path_points(source, target))
 
-    engine.qcircuit.mct(control_qubits, path_ancilla,
-                        engine.mct_register, mode='advanced')
-    engine.qcircuit.unitary(iSwap_controlled, [qsource, qtarget, path_ancilla])
+    if path_clear is None:
+        _apply_template(engine, _standard_slide_template,
+                        [_get_qubits(engine, controls)], [qsource, qtarget])
 
-    for point in engine.qchess.get_path_points(source, target):
-        engine.qcircuit.x(engine.get_qubit(point.x, point.y))
+    elif path_clear:
+        engine.qcircuit.append(iSwap, [qsource, qtarget])
 
 
 """
@@ -121,59 +239,141 @@ def perform_standard_slide(engine, source, target):
 """
 
 
-def perform_capture_slide(engine, source, target):
-    control_qubits = []
-
-    for point in engine.qchess.get_path_points(source, target):
-        control_qubits.append(engine.get_qubit(point.x, point.y))
-        engine.qcircuit.x(engine.get_qubit(point.x, point.y))
-
-    qsource = engine.get_qubit(source.x, source.y)
-    qtarget = engine.get_qubit(target.x, target.y)
+def _capture_condition_template(circuit, paths, squares, aregister, mct_register):
+    control_qubits, = paths
+    qtarget, = squares
 
     #holds if the path is clear or not
-    path_ancilla = engine.aregister[0]
-    engine.qcircuit.reset(path_ancilla)
-    engine.qcircuit.x(path_ancilla)
+    path_ancilla = aregister[0]
+    circuit.reset(path_ancilla)
+    circuit.x(path_ancilla)
 
-    engine.qcircuit.mct(control_qubits, path_ancilla,
-                        engine.mct_register, mode='advanced')
+    _compute_path_clear(circuit, control_qubits, path_ancilla, mct_register)
 
     #holds the final condition that's going to be measured
-    cond_ancilla = engine.aregister[1]
-    engine.qcircuit.reset(cond_ancilla)
+    cond_ancilla = aregister[1]
+    circuit.reset(cond_ancilla)
 
     #holds the captured piece
-    captured_piece = engine.aregister[2]
-    engine.qcircuit.reset(captured_piece)
+    captured_piece = aregister[2]
+    circuit.reset(captured_piece)
 
     #path is not blocked
-    engine.qcircuit.x(path_ancilla)
-    engine.qcircuit.cx(path_ancilla, cond_ancilla)
-    engine.qcircuit.x(path_ancilla)
+    circuit.x(path_ancilla)
+    circuit.cx(path_ancilla, cond_ancilla)
+    circuit.x(path_ancilla)
 
     #blocked but target empty
-    engine.qcircuit.x(qtarget)
-    engine.qcircuit.ccx(qtarget, path_ancilla, cond_ancilla)
-    engine.qcircuit.x(qtarget)
+    circuit.x(qtarget)
+    circuit.ccx(qtarget, path_ancilla, cond_ancilla)
+    circuit.x(qtarget)
+
+    #undo the X, the path ancilla holds the result now
+    for qubit in control_qubits:
+        circuit.x(qubit)
+
+
+def perform_capture_slide(engine, source, target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    controls, path_clear = _get_path_controls(
+        engine, engine.qchess.get_path_points(source, target))
+
+    if path_clear:
+        #the piece always captures, so there's nothing to measure
+        perform_capture_jump(engine, source, target)
+        return True
+
+    control_qubits = _get_qubits(engine, controls)
+
+    _apply_template(engine, _capture_condition_template,
+                    [control_qubits], [qtarget])
+
+    path_ancilla = engine.aregister[0]
+    cond_ancilla = engine.aregister[1]
+    captured_piece = engine.aregister[2]
+
+    """
+        The engine collapses the path right after this if the condition is false,
+        or if it's true but double occupancy is violated. Both only depend on the
+        board before the move, so the path is measured in the same step as the
+        condition (only when it's needed).
+    """
+    collapse_indices = engine.get_capture_collapse_indices(source, target)
+    always_collapse = engine.does_slide_violate_double_occupancy(source, target)
+
+    if engine.incremental:
+        collapse_qubits = [engine.get_square_qubit(i) for i in collapse_indices]
+
+        engine.update_statevector()
+
+        indices = [engine.qubit_indices[qubit]
+                   for qubit in [cond_ancilla] + collapse_qubits]
+
+        #sample the condition and the path together from the statevector
+        values = engine.sample_values(indices)
+        cond = values[0]
+
+        if always_collapse or not cond:
+            engine.project_qubits(indices, values)
+
+            premeasured = dict(zip(collapse_indices, values[1:]))
+
+            #the squares were sampled before the slide, so if the piece
+            #captured it's in target now
+            if cond and path_clear is None and not any(
+                premeasured[engine.qchess.get_array_index(point.x, point.y)]
+                for point in controls
+            ):
+                premeasured[engine.qchess.get_array_index(
+                    source.x, source.y)] = False
+                premeasured[engine.qchess.get_array_index(
+                    target.x, target.y)] = True
+
+            engine.premeasured = premeasured
+        else:
+            engine.project_qubits(indices[:1], values[:1])
+
+        if cond:
+            engine.qcircuit.append(
+                iSwap_controlled, [path_ancilla, qtarget, captured_piece])
+            engine.qcircuit.append(
+                iSwap_controlled, [path_ancilla, qsource, qtarget])
+
+        return cond
 
     engine.qcircuit.measure(cond_ancilla, engine.cbit_misc[0])
 
-    engine.qcircuit.unitary(iSwap_controlled, [
-                            qtarget, captured_piece, path_ancilla]).c_if(engine.cbit_misc, 1)
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qsource, qtarget, path_ancilla]).c_if(engine.cbit_misc, 1)
+    _append_conditioned(engine, iSwap_controlled, [
+                        path_ancilla, qtarget, captured_piece], engine.cbit_misc, 1)
+    _append_conditioned(engine, iSwap_controlled, [
+                        path_ancilla, qsource, qtarget], engine.cbit_misc, 1)
 
-    for qubit in control_qubits:
-        engine.qcircuit.x(qubit)
+    #the path is measured after the slide in the same run
+    for i in collapse_indices:
+        measure = engine.qcircuit.measure(
+            engine.get_square_qubit(i), engine.cregister[i])
+
+        if not always_collapse:
+            measure.c_if(engine.cbit_misc, 0)
 
-    result = execute(engine.qcircuit, backend=backend, shots=1).result()
+    result = engine.run_circuit()
 
     #since get_counts() gives '1 00000001'
     #a bit hacky but I don't know any other way to get this result
-    cbit_value = int(list(result.get_counts().keys())[0].split(' ')[0])
+    cbit_value, bitstring = list(result.get_counts().keys())[0].split(' ')
+    cond = int(cbit_value) == 1
 
-    return (cbit_value == 1)
+    if always_collapse or not cond:
+        bitstring = bitstring[::-1]
+        engine.premeasured = {i: bitstring[i] == '1' for i in collapse_indices}
+
+    elif collapse_indices:
+        #the path isn't collapsed, so the measurements are removed again
+        del engine.qcircuit.data[-len(collapse_indices):]
+
+    return cond
 
 
 """
@@ -185,93 +385,118 @@ def perform_capture_slide(engine, source, target):
 """
 
 
-def _slide_split_merge(engine, single, double1, double2, is_split):
-    qsingle = engine.get_qubit(single.x, single.y)
-    qdouble1 = engine.get_qubit(double1.x, double1.y)
-    qdouble2 = engine.get_qubit(double2.x, double2.y)
-
-    #get all qubits in first path
-    control_qubits1 = []
-    for point in engine.qchess.get_path_points(single, double1):
-        control_qubits1.append(engine.get_qubit(point.x, point.y))
-        engine.qcircuit.x(engine.get_qubit(point.x, point.y))
+def _slide_split_merge_template(circuit, paths, squares, aregister, mct_register, is_split):
+    control_qubits1, control_qubits2 = paths
+    qsingle, qdouble1, qdouble2 = squares
 
     #holds if the first path is clear or not
-    path_ancilla1 = engine.aregister[0]
-    engine.qcircuit.reset(path_ancilla1)
-    engine.qcircuit.x(path_ancilla1)
+    path_ancilla1 = aregister[0]
+    circuit.reset(path_ancilla1)
+    circuit.x(path_ancilla1)
 
-    #perform their combined CNOT
-    engine.qcircuit.mct(control_qubits1, path_ancilla1,
-                        engine.mct_register, mode='advanced')
+    _compute_path_clear(circuit, control_qubits1, path_ancilla1, mct_register)
 
     #undo the X
     for qubit in control_qubits1:
-        engine.qcircuit.x(qubit)
-
-    #get all qubits in second path
-    control_qubits2 = []
-    for point in engine.qchess.get_path_points(single, double2):
-        control_qubits2.append(engine.get_qubit(point.x, point.y))
-        engine.qcircuit.x(engine.get_qubit(point.x, point.y))
+        circuit.x(qubit)
 
     #holds if the second path is clear or not
-    path_ancilla2 = engine.aregister[1]
-    engine.qcircuit.reset(path_ancilla2)
-    engine.qcircuit.x(path_ancilla2)
+    path_ancilla2 = aregister[1]
+    circuit.reset(path_ancilla2)
+    circuit.x(path_ancilla2)
 
-    #perform their combined CNOT
-    engine.qcircuit.mct(control_qubits2, path_ancilla2,
-                        engine.mct_register, mode='advanced')
+    _compute_path_clear(circuit, control_qubits2, path_ancilla2, mct_register)
 
     for qubit in control_qubits2:
-        engine.qcircuit.x(qubit)
+        circuit.x(qubit)
 
     #holds the control for jump and slide
-    control_ancilla = engine.aregister[2]
-    engine.qcircuit.reset(control_ancilla)
-    engine.qcircuit.x(control_ancilla)
+    control_ancilla = aregister[2]
+    circuit.reset(control_ancilla)
+    circuit.x(control_ancilla)
 
     #perform the split/merge
-    engine.qcircuit.x(path_ancilla1)
-    engine.qcircuit.x(path_ancilla2)
-    engine.qcircuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
+    circuit.x(path_ancilla1)
+    circuit.x(path_ancilla2)
+    circuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
 
     if is_split:
-        engine.qcircuit.unitary(iSwap_sqrt_controlled, [
-                                qdouble1, qsingle, control_ancilla])
-        engine.qcircuit.unitary(
-            iSwap_controlled, [qsingle, qdouble2, control_ancilla])
+        circuit.append(
+            iSwap_sqrt_controlled, [control_ancilla, qdouble1, qsingle])
+        circuit.append(
+            iSwap_controlled, [control_ancilla, qsingle, qdouble2])
     else:
-        engine.qcircuit.unitary(
-            iSwap_controlled, [qsingle, qdouble2, control_ancilla])
-        engine.qcircuit.unitary(iSwap_sqrt_controlled, [
-                                qdouble1, qsingle, control_ancilla])
+        circuit.append(
+            iSwap_controlled, [control_ancilla, qsingle, qdouble2])
+        circuit.append(
+            iSwap_sqrt_controlled, [control_ancilla, qdouble1, qsingle])
 
-    engine.qcircuit.x(path_ancilla1)
-    engine.qcircuit.x(path_ancilla2)
+    circuit.x(path_ancilla1)
+    circuit.x(path_ancilla2)
 
     #reset the control
-    engine.qcircuit.reset(control_ancilla)
-    engine.qcircuit.x(control_ancilla)
+    circuit.reset(control_ancilla)
+    circuit.x(control_ancilla)
 
     #perform one jump
-    engine.qcircuit.x(path_ancilla1)
-    engine.qcircuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qdouble1, qsingle, control_ancilla])
-    engine.qcircuit.x(path_ancilla1)
+    circuit.x(path_ancilla1)
+    circuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
+    circuit.append(
+        iSwap_controlled, [control_ancilla, qdouble1, qsingle])
+    circuit.x(path_ancilla1)
 
     #reset the control
-    engine.qcircuit.reset(control_ancilla)
-    engine.qcircuit.x(control_ancilla)
+    circuit.reset(control_ancilla)
+    circuit.x(control_ancilla)
 
     #perform the other jump
-    engine.qcircuit.x(path_ancilla2)
-    engine.qcircuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qsingle, qdouble2, control_ancilla])
-    engine.qcircuit.x(path_ancilla2)
+    circuit.x(path_ancilla2)
+    circuit.ccx(path_ancilla1, path_ancilla2, control_ancilla)
+    circuit.append(
+        iSwap_controlled, [control_ancilla, qsingle, qdouble2])
+    circuit.x(path_ancilla2)
+
+
+def _split_slide_template(circuit, paths, squares, aregister, mct_register):
+    _slide_split_merge_template(
+        circuit, paths, squares, aregister, mct_register, is_split=True)
+
+
+def _merge_slide_template(circuit, paths, squares, aregister, mct_register):
+    _slide_split_merge_template(
+        circuit, paths, squares, aregister, mct_register, is_split=False)
+
+
+def _slide_split_merge(engine, single, double1, double2, is_split):
+    qsingle = engine.get_qubit(single.x, single.y)
+    qdouble1 = engine.get_qubit(double1.x, double1.y)
+    qdouble2 = engine.get_qubit(double2.x, double2.y)
+
+    controls1, path1_clear = _get_path_controls(
+        engine, engine.qchess.get_path_points(single, double1))
+    controls2, path2_clear = _get_path_controls(
+        engine, engine.qchess.get_path_points(single, double2))
+
+    if path1_clear is None or path2_clear is None:
+        paths = [_get_qubits(engine, controls1), _get_qubits(engine, controls2)]
+
+        builder = _split_slide_template if is_split else _merge_slide_template
+        _apply_template(engine, builder, paths, [qsingle, qdouble1, qdouble2])
+
+    #both paths are known, so only the gates of that case are needed
+    elif path1_clear and path2_clear:
+        if is_split:
+            engine.qcircuit.append(iSwap_sqrt, [qdouble1, qsingle])
+            engine.qcircuit.append(iSwap, [qsingle, qdouble2])
+        else:
+            engine.qcircuit.append(iSwap, [qsingle, qdouble2])
+            engine.qcircuit.append(iSwap_sqrt, [qdouble1, qsingle])
+
+    elif path1_clear:
+        engine.qcircuit.append(iSwap, [qdouble1, qsingle])
+
+    elif path2_clear:
+        engine.qcircuit.append(iSwap, [qsingle, qdouble2])
 
 
 def perform_split_slide(engine, source, target1, target2):
@@ -282,58 +507,94 @@ def perform_merge_slide(engine, source1, source2, target):
     _slide_split_merge(engine, target, source1, source2, is_split=False)
 
 
-def perform_standard_en_passant(engine, source, target, ep_target):
-    qsource = engine.get_qubit(source.x, source.y)
-    qtarget = engine.get_qubit(target.x, target.y)
-    qep_target = engine.get_qubit(ep_target.x, ep_target.y)
+def _standard_en_passant_template(circuit, paths, squares, aregister, mct_register):
+    qsource, qtarget, qep_target = squares
 
-    captured_ancilla = engine.aregister[0]
-    engine.qcircuit.reset(captured_ancilla)
+    captured_ancilla = aregister[0]
+    circuit.reset(captured_ancilla)
 
     #holds if both source and ep_target are empty or not at the same time
-    both_pieces_ancilla = engine.aregister[1]
-    engine.qcircuit.reset(both_pieces_ancilla)
+    both_pieces_ancilla = aregister[1]
+    circuit.reset(both_pieces_ancilla)
 
-    engine.qcircuit.ccx(qsource, qep_target, both_pieces_ancilla)
-    engine.qcircuit.x(both_pieces_ancilla)
+    circuit.ccx(qsource, qep_target, both_pieces_ancilla)
+    circuit.x(both_pieces_ancilla)
 
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qep_target, captured_ancilla, both_pieces_ancilla])
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qsource, qtarget, both_pieces_ancilla])
+    circuit.append(
+        iSwap_controlled, [both_pieces_ancilla, qep_target, captured_ancilla])
+    circuit.append(
+        iSwap_controlled, [both_pieces_ancilla, qsource, qtarget])
 
 
-def perform_capture_en_passant(engine, source, target, ep_target):
+def perform_standard_en_passant(engine, source, target, ep_target):
     qsource = engine.get_qubit(source.x, source.y)
     qtarget = engine.get_qubit(target.x, target.y)
     qep_target = engine.get_qubit(ep_target.x, ep_target.y)
 
+    _apply_template(engine, _standard_en_passant_template,
+                    [], [qsource, qtarget, qep_target])
+
+
+def _capture_en_passant_template(circuit, paths, squares, aregister, mct_register):
+    qsource, qtarget, qep_target = squares
+
     #since this move can capture two pieces at the same time,
     #we need two ancillas to hold them
-    captured_ancilla1 = engine.aregister[0]
-    engine.qcircuit.reset(captured_ancilla1)
+    captured_ancilla1 = aregister[0]
+    circuit.reset(captured_ancilla1)
 
-    captured_ancilla2 = engine.aregister[1]
-    engine.qcircuit.reset(captured_ancilla2)
+    captured_ancilla2 = aregister[1]
+    circuit.reset(captured_ancilla2)
 
     #holds if any of target, ep_target exist
     #Note: It's impossible for them to exist at the same time (during this function's call),
     #   since if they did that would mean that target piece has reached its position
     #   after the pawn moved and thus EP would not be not a valid move.
-    any_piece_ancilla = engine.aregister[2]
-    engine.qcircuit.reset(any_piece_ancilla)
+    any_piece_ancilla = aregister[2]
+    circuit.reset(any_piece_ancilla)
 
-    engine.qcircuit.cx(qep_target, any_piece_ancilla)
-    engine.qcircuit.cx(qtarget, any_piece_ancilla)
+    circuit.cx(qep_target, any_piece_ancilla)
+    circuit.cx(qtarget, any_piece_ancilla)
 
-    engine.qcircuit.x(any_piece_ancilla)
+    circuit.x(any_piece_ancilla)
 
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qep_target, captured_ancilla1, any_piece_ancilla])
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qtarget, captured_ancilla2, any_piece_ancilla])
-    engine.qcircuit.unitary(
-        iSwap_controlled, [qsource, qtarget, any_piece_ancilla])
+    circuit.append(
+        iSwap_controlled, [any_piece_ancilla, qep_target, captured_ancilla1])
+    circuit.append(
+        iSwap_controlled, [any_piece_ancilla, qtarget, captured_ancilla2])
+    circuit.append(
+        iSwap_controlled, [any_piece_ancilla, qsource, qtarget])
+
+
+def perform_capture_en_passant(engine, source, target, ep_target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+    qep_target = engine.get_qubit(ep_target.x, ep_target.y)
+
+    _apply_template(engine, _capture_en_passant_template,
+                    [], [qsource, qtarget, qep_target])
+
+
+def _castle_template(circuit, paths, squares, aregister, mct_register):
+    control_qubits, = paths
+    qking_source, qrook_source, qking_target, qrook_target = squares
+
+    #holds if the path is empty or not
+    path_ancilla = aregister[0]
+    circuit.reset(path_ancilla)
+    circuit.x(path_ancilla)
+
+    _compute_path_clear(circuit, control_qubits, path_ancilla, mct_register)
+
+    #undo the x
+    for qubit in control_qubits:
+        circuit.x(qubit)
+
+    #perform the movement
+    circuit.append(
+        iSwap_controlled, [path_ancilla, qking_source, qking_target])
+    circuit.append(
+        iSwap_controlled, [path_ancilla, qrook_source, qrook_target])
 
 #path holds all points that must be empty for the move to be valid (excluding targets)
 
@@ -344,31 +605,12 @@ def perform_castle(engine, king_source, rook_source, king_target, rook_target, p
     qking_target = engine.get_qubit(king_target.x, king_target.y)
     qrook_target = engine.get_qubit(rook_target.x, rook_target.y)
 
-    if path:
-        #holds all the qubits of the path
-        control_qubits = []
-        for point in path:
-            control_qubits.append(engine.get_qubit(point.x, point.y))
-            engine.qcircuit.x(engine.get_qubit(point.x, point.y))
-
-        #holds if the path is empty or not
-        path_ancilla = engine.aregister[0]
-        engine.qcircuit.reset(path_ancilla)
-        engine.qcircuit.x(path_ancilla)
+    controls, path_clear = _get_path_controls(engine, path or [])
 
-        engine.qcircuit.mct(control_qubits, path_ancilla,
-                            engine.mct_register, mode='advanced')
-
-        #undo the x
-        for qubit in control_qubits:
-            engine.qcircuit.x(qubit)
-
-        #perform the movement
-        engine.qcircuit.unitary(
-            iSwap_controlled, [qking_source, qking_target, path_ancilla])
-        engine.qcircuit.unitary(
-            iSwap_controlled, [qrook_source, qrook_target, path_ancilla])
-    else:
+    if path_clear is None:
+        _apply_template(engine, _castle_template, [_get_qubits(engine, controls)], [
+                        qking_source, qrook_source, qking_target, qrook_target])
+    elif path_clear:
         #perform the movement
-        engine.qcircuit.unitary(iSwap, [qking_source, qking_target])
-        engine.qcircuit.unitary(iSwap, [qrook_source, qrook_target])
+        engine.qcircuit.append(iSwap, [qking_source, qking_target])
+        engine.qcircuit.append(iSwap, [qrook_source, qrook_target])
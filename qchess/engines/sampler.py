@@ -0,0 +1,19 @@
+import numpy as np
+
+"""
+Source of randomness of the engine measurements.
+The engine and its states share the same Sampler, so replacing its
+generator changes the outcome of every measurement at once.
+"""
+
+
+class Sampler:
+    def __init__(self, generator=None):
+        if generator is None:
+            generator = np.random.default_rng()
+
+        self.generator = generator
+
+    #choose an index from range(n) with (normalized) probabilities p
+    def choice(self, n, p):
+        return self.generator.choice(n, p=p)
@@ -0,0 +1,102 @@
+import numpy as np
+
+from qchess.engines.sampler import Sampler
+
+"""
+Run a sequence of actions many times and get the distribution of the
+final classical boards, without simulating every shot on its own.
+
+The actions are performed once on a fork of the game (see QChess.fork).
+When an action measures, the shots are split between the possible outcomes
+and the action is performed again on a new fork once per outcome, so the
+work done before the measurement is shared by all the shots.
+"""
+
+
+#raised by the forced generator when it has no outcome left
+class _Branch(Exception):
+    def __init__(self, probabilities):
+        super().__init__()
+        self.probabilities = probabilities
+
+
+#generator that returns the given outcomes in order
+class _ForcedGenerator:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.position = 0
+
+    def choice(self, n, p):
+        if self.position == len(self.outcomes):
+            raise _Branch(np.asarray(p))
+
+        outcome = self.outcomes[self.position]
+        self.position += 1
+
+        return outcome
+
+
+def _board_key(qchess):
+    return tuple(tuple(row) for row in qchess.get_simplified_matrix())
+
+
+def _run_branches(qchess, actions, shots, boards, generator):
+    if not actions:
+        key = _board_key(qchess)
+        boards[key] = boards.get(key, 0) + shots
+        return
+
+    #every branch holds the outcomes of the measurements done so far by the action
+    branches = [([], shots)]
+
+    while branches:
+        outcomes, branch_shots = branches.pop()
+
+        branch = qchess.fork()
+        branch.engine.rng.generator = _ForcedGenerator(outcomes)
+
+        try:
+            actions[0](branch)
+        except _Branch as branch_point:
+            counts = generator.multinomial(
+                branch_shots, branch_point.probabilities)
+
+            for outcome, count in enumerate(counts):
+                if count:
+                    branches.append((outcomes + [outcome], count))
+
+            continue
+
+        branch.engine.rng.generator = generator
+
+        _run_branches(branch, actions[1:], branch_shots, boards, generator)
+
+
+"""
+Perform the actions (functions that receive a QChess) on copies of
+qchess, which is left untouched, and return a dict from final board
+(tuple of rows of get_simplified_matrix) to the number of shots.
+"""
+
+
+def run_shots(qchess, actions, shots, generator=None):
+    if generator is None:
+        generator = np.random.default_rng()
+
+    boards = {}
+
+    if isinstance(getattr(qchess.engine, 'rng', None), Sampler):
+        _run_branches(qchess, list(actions), shots, boards, generator)
+
+    else:
+        #the engine doesn't sample through a Sampler, so every shot runs on its own
+        for i in range(shots):
+            branch = qchess.fork()
+
+            for action in actions:
+                action(branch)
+
+            key = _board_key(branch)
+            boards[key] = boards.get(key, 0) + 1
+
+    return boards
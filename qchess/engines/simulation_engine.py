@@ -0,0 +1,890 @@
+import copy
+
+from qchess.piece import *
+from qchess.pawn import Pawn
+
+from qchess.engines.base_engine import BaseEngine
+from qchess.engines.entanglement import EntanglementGroups, split_qflags
+from qchess.engines.sampler import Sampler
+
+"""
+Board bookkeeping shared by all the simulators.
+Subclasses set utils to a module with the perform_* functions
+and implement the methods that raise NotImplementedError.
+"""
+
+
+class SimulationEngine(BaseEngine):
+    utils = None
+
+    def __init__(self, qchess, width, height):
+        self.qchess = qchess
+        self.classical_board = qchess.board
+        self.width = width
+        self.height = height
+
+        #every piece has a qflag of its own, and the qflags of entangled pieces
+        #are in the same group (see qchess.engines.entanglement)
+        self.groups = EntanglementGroups()
+
+        #array indices of the squares whose simulated value must be flipped
+        #before they are used again (see move_classically)
+        self.pending_flips = set()
+
+        #values of squares already measured ahead by the current move,
+        #used instead of measuring them again (see take_premeasured)
+        self.premeasured = {}
+
+        #cached occupancy probability of the squares in superposition, by array index,
+        #and the squares used since it was computed (see get_occupancy_probabilities)
+        self.occupancy = {}
+        self.touched_squares = set()
+        self.touched_qflags = set()
+
+        if self.is_board_too_large(width, height):
+            print()
+            print('-----------WARNING-----------')
+            print('Maximum number of qubits exceeded')
+            print(
+                'You can still play the game, but the program might crash if the system becomes too entangled')
+            print()
+
+        self.reset_state()
+
+    """
+    Check if the simulation may not fit in memory for a board of that size.
+    """
+    @classmethod
+    def is_board_too_large(cls, width, height):
+        return width * height > cls.utils.MAX_QUBIT_MEMORY
+
+    """
+    Reset the simulated state so it only holds the pieces currently
+    on the classical board, each one with 100% probability.
+    """
+    def reset_state(self):
+        raise NotImplementedError()
+
+    """
+    Called after some squares are collapsed while others remain in superposition.
+    Engines can use it to drop the history of the measured squares.
+    """
+    def compact_state(self):
+        pass
+
+    """
+    Set the square (x, y), currently empty, to hold a piece with 100% probability.
+    """
+    def prepare_piece(self, x, y):
+        raise NotImplementedError()
+
+    """
+    Flip the value of the square with the given array index (an X gate).
+    """
+    def flip_square(self, index):
+        raise NotImplementedError()
+
+    """
+    Apply the pending flip of the square, if any, to the simulated state.
+    Subclasses call it before a square is used by a quantum operation.
+    """
+    def apply_pending_flip(self, index):
+        self.touch_square(index)
+
+        if index in self.pending_flips:
+            self.pending_flips.remove(index)
+            self.flip_square(index)
+
+    """
+    Mark the square with the given array index as used by a quantum operation,
+    so its cached occupancy probability and the ones of the squares entangled
+    with it are computed again.
+    """
+    def touch_square(self, index):
+        self.touched_squares.add(index)
+
+        #the piece may leave the square before the probabilities are requested
+        self.touched_qflags.add(self.qchess.get_piece(index).qflag)
+
+    """
+    Probability of every square (by array index) holding a piece.
+    Only the squares in superposition need the simulated state, and their
+    probabilities are cached: a quantum operation can only change the ones
+    of the squares it uses and the squares entangled with them, so only
+    those are computed again after a move.
+    """
+    def get_occupancy_probabilities(self):
+        qflags = self.touched_qflags | {
+            self.qchess.get_piece(i).qflag for i in self.touched_squares}
+
+        touched_groups = {
+            self.groups.find(qflag) for qflag in qflags if qflag in self.groups}
+
+        probabilities = [0.0] * (self.width * self.height)
+        changed = []
+
+        for i in range(self.width * self.height):
+            piece = self.qchess.get_piece(i)
+
+            if piece == NullPiece:
+                continue
+
+            if piece.collapsed:
+                probabilities[i] = 1.0
+
+            elif (
+                i in self.occupancy and i not in self.touched_squares and
+                self.groups.find(piece.qflag) not in touched_groups
+            ):
+                probabilities[i] = self.occupancy[i]
+
+            else:
+                changed.append(i)
+
+        if changed:
+            for i, probability in zip(changed, self.get_square_probabilities(changed)):
+                probabilities[i] = probability
+
+        self.occupancy = {
+            i: probabilities[i] for i in range(self.width * self.height)
+            if not self.qchess.get_piece(i).collapsed}
+
+        self.touched_squares = set()
+        self.touched_qflags = set()
+
+        return probabilities
+
+    """
+    Probability of the squares with the given array indices holding a piece,
+    in the same order, computed from the simulated state.
+    The squares are in superposition, so they don't have a pending flip.
+    """
+    def get_square_probabilities(self, indices):
+        raise NotImplementedError()
+
+    """
+    Move a collapsed piece to target, which must be empty or hold a collapsed
+    piece to capture, when the path (if any) is known to be empty.
+    Since no square in superposition is involved, only the classical board
+    is updated and the changed squares are flipped lazily.
+    """
+    def move_classically(self, source, target):
+        piece = self.classical_board[source.x][source.y]
+        target_piece = self.classical_board[target.x][target.y]
+
+        assert(piece.collapsed and target_piece.collapsed)
+
+        self.pending_flips ^= {self.qchess.get_array_index(source.x, source.y)}
+
+        if target_piece == NullPiece:
+            self.pending_flips ^= {
+                self.qchess.get_array_index(target.x, target.y)}
+
+        self.place_piece(source, NullPiece)
+        self.place_piece(target, piece.copy())
+
+    """
+    Measure the squares with the given array indices.
+    Returns a list with True for every occupied square, in the same order.
+    After the call the squares must hold the measured values.
+    """
+    def measure_squares(self, indices):
+        raise NotImplementedError()
+
+    """
+    Get the points of the path that decide if it's clear. The squares that
+    the classical board knows are empty are skipped, and if a collapsed piece
+    is blocking the path only its point is returned.
+    """
+    def get_path_controls(self, points):
+        controls = []
+
+        for point in points:
+            piece = self.classical_board[point.x][point.y]
+
+            if piece == NullPiece:
+                continue
+
+            if piece.collapsed:
+                return [point]
+
+            controls.append(point)
+
+        return controls
+
+    """
+    Return the premeasured values of the squares with the given array indices,
+    or None if they weren't all measured ahead. The premeasured values are
+    discarded either way.
+    """
+    def take_premeasured(self, indices):
+        premeasured = self.premeasured
+        self.premeasured = {}
+
+        if not all(i in premeasured for i in indices):
+            return None
+
+        return [premeasured[i] for i in indices]
+
+    """
+    Keyword arguments of the engine, besides the seed.
+    Needed to create the same engine again when a game is loaded.
+    """
+    def get_options(self):
+        return {}
+
+    """
+    Information needed to restore the simulation, as a dict that can be stored
+    as json and a dict of numpy arrays (see qchess.save).
+    Subclasses add the simulated state.
+    """
+    def save_state(self):
+        info = {
+            'options': self.get_options(),
+            'groups': self.groups.save(),
+            'pending_flips': sorted(self.pending_flips)
+        }
+
+        #the next measurements are the same after loading
+        rng = getattr(self, 'rng', None)
+        if isinstance(rng, Sampler):
+            info['rng'] = rng.generator.bit_generator.state
+
+        return info, {}
+
+    """
+    Restore the simulation saved by save_state.
+    The classical board must be restored already.
+    """
+    def load_state(self, info, arrays):
+        self.groups = EntanglementGroups.load(info['groups'])
+
+        for i in range(self.width * self.height):
+            qflag = self.qchess.get_piece(i).qflag
+            if qflag in self.groups:
+                self.groups.add_square(qflag, i)
+
+        self.pending_flips = set(info['pending_flips'])
+        self.premeasured = {}
+
+        self.occupancy = {}
+        self.touched_squares = set()
+        self.touched_qflags = set()
+
+        if 'rng' in info:
+            self.rng.generator.bit_generator.state = info['rng']
+
+    def fork(self, qchess):
+        engine = copy.copy(self)
+        engine.qchess = qchess
+        engine.classical_board = qchess.board
+        engine.pending_flips = set(self.pending_flips)
+        engine.premeasured = dict(self.premeasured)
+        engine.occupancy = dict(self.occupancy)
+        engine.touched_squares = set(self.touched_squares)
+        engine.touched_qflags = set(self.touched_qflags)
+        engine.groups = self.groups.copy()
+
+        #the fork draws the same numbers, but from its own generator
+        rng = getattr(self, 'rng', None)
+        if isinstance(rng, Sampler):
+            engine.rng = Sampler(copy.deepcopy(rng.generator))
+
+        return engine
+
+    """
+    Set the piece of a square of the classical board, keeping the squares
+    of the entanglement groups up to date.
+    """
+    def place_piece(self, point, piece):
+        index = self.qchess.get_array_index(point.x, point.y)
+
+        old_piece = self.classical_board[point.x][point.y]
+        if old_piece.qflag in self.groups:
+            self.groups.remove_square(old_piece.qflag, index)
+
+        self.classical_board[point.x][point.y] = piece
+
+        if piece == NullPiece or not piece.qflag:
+            return
+
+        #the piece may have left the board while its group was collapsed
+        if piece.qflag not in self.groups:
+            self.groups.add(piece.qflag)
+
+        self.groups.add_square(piece.qflag, index)
+
+    #roots of the groups of the qflags in the mask
+    def get_group_roots(self, mask):
+        return {
+            self.groups.find(qflag) for qflag in split_qflags(mask) if qflag in self.groups}
+
+    #array indices of the squares of the groups, in order
+    def get_group_squares(self, roots):
+        squares = set()
+        for root in roots:
+            squares |= self.groups.squares[root]
+
+        return sorted(squares)
+
+    def on_add_piece(self, x, y, piece):
+        piece.qflag = self.groups.new_qflag()
+        self.groups.add_square(piece.qflag, self.qchess.get_array_index(x, y))
+
+        #the value is already |0> (no piece)
+        #since we want to add the piece with 100% probability, we swap to |1>
+        self.prepare_piece(x, y)
+
+    def on_pawn_promotion(self, promoted_pawn, pawn):
+        promoted_pawn.qflag = pawn.qflag
+
+    def get_all_entangled_points(self, x, y):
+        roots = self.get_group_roots(self.classical_board[x][y].qflag)
+
+        return [self.qchess.get_board_point(i) for i in self.get_group_squares(roots)]
+
+    #join the groups of all the qflags in both masks
+    def entangle_flags(self, qflag1, qflag2):
+        roots1 = self.get_group_roots(qflag1)
+        roots2 = self.get_group_roots(qflag2)
+
+        #nullpiece
+        if not roots1 or not roots2:
+            return
+
+        roots = list(roots1 | roots2)
+        for root in roots[1:]:
+            self.groups.union(roots[0], root)
+
+    def entangle_path_flags(self, qflag, source, target):
+        all_qflags = 0
+
+        pieces = self.qchess.get_path_pieces(source, target)
+
+        for piece in pieces:
+            all_qflags |= piece.qflag
+
+        self.entangle_flags(all_qflags, qflag)
+
+        return bool(pieces)
+
+    def collapse_by_flag(self, qflag, collapse_all=False):
+        #nullpiece
+        if not qflag and not collapse_all:
+            return
+
+        if collapse_all:
+            squares = range(self.width * self.height)
+        else:
+            roots = self.get_group_roots(qflag)
+            squares = self.get_group_squares(roots)
+
+        collapsed_indices = []
+
+        for i in squares:
+            piece = self.qchess.get_piece(i)
+
+            if not piece.collapsed and piece != NullPiece:
+                collapsed_indices.append(i)
+
+        if collapsed_indices:
+            for i in collapsed_indices:
+                self.touch_square(i)
+
+            values = self.measure_squares(collapsed_indices)
+
+            for i, value in zip(collapsed_indices, values):
+                pos = self.qchess.get_board_point(i)
+
+                if not value:
+                    self.place_piece(pos, NullPiece)
+
+                else:
+                    piece = self.qchess.get_piece(i)
+                    assert(piece != NullPiece)
+                    piece.collapsed = True
+
+        #assign new qflags to all the pieces
+        if collapse_all:
+            self.groups = EntanglementGroups()
+
+            for i in range(self.height * self.width):
+                piece = self.qchess.get_piece(i)
+                if piece == NullPiece:
+                    continue
+
+                piece.qflag = self.groups.new_qflag()
+                self.groups.add_square(piece.qflag, i)
+
+        #every piece left in the groups is collapsed now, so each one
+        #gets a group of its own with one of the qflags of its old group
+        #(since we can't be 100% sure of the original qflag of a piece)
+        else:
+            removed = [self.groups.remove(root) for root in roots]
+
+            for qflags, squares in removed:
+                qflags.sort()
+
+                for i in sorted(squares):
+                    piece = self.qchess.get_piece(i)
+
+                    if qflags:
+                        piece.qflag = qflags.pop(0)
+                        self.groups.add(piece.qflag)
+                    else:
+                        piece.qflag = self.groups.new_qflag()
+
+                    self.groups.add_square(piece.qflag, i)
+
+                #the qflags left belonged to pieces that are no longer on the board
+                self.groups.release(qflags)
+
+        all_collapsed = collapse_all
+
+        if not all_collapsed:
+            all_collapsed = True
+
+            for i in range(self.width * self.height):
+                if not self.qchess.get_piece(i).collapsed:
+                    all_collapsed = False
+                    break
+
+        #the state is reset when all pieces are collapsed, even if
+        #no new pieces were collapsed in this call
+        #when all the qubits are |0> or |1>, it's cheaper to just reset
+        #the state than to keep track of all the qubits operations
+        if all_collapsed:
+            self.pending_flips.clear()
+            self.reset_state()
+
+        #otherwise only the measured squares can be dropped
+        elif collapsed_indices:
+            self.compact_state()
+
+    def set_piece_uncollapsed(self, point):
+        if self.classical_board[point.x][point.y] != NullPiece:
+            self.classical_board[point.x][point.y].collapsed = False
+
+    def collapse_path(self, source, target, collapse_target=False, collapse_source=False):
+        qflag = 0
+
+        for piece in self.qchess.get_path_pieces(source, target):
+            qflag |= piece.qflag
+
+        source_piece = self.classical_board[source.x][source.y]
+        if source_piece != NullPiece and collapse_source:
+            #force the piece to get collapsed
+            source_piece.collapsed = False
+
+            qflag |= source_piece.qflag
+
+        target_piece = self.classical_board[target.x][target.y]
+        if target_piece != NullPiece and collapse_source:
+            #force the piece to get collapsed
+            target_piece.collapsed = False
+
+            qflag |= target_piece.qflag
+
+        self.collapse_by_flag(qflag)
+
+        #return true if path is clear after collapse
+        return not bool(self.qchess.get_path_pieces(source, target))
+
+    """
+    Array indices of the squares that collapse_path(source, target, collapse_source=True)
+    measures, so an engine can measure them in the same step as a capture slide.
+    """
+    def get_capture_collapse_indices(self, source, target):
+        qflag = 0
+
+        for piece in self.qchess.get_path_pieces(source, target):
+            qflag |= piece.qflag
+
+        forced_points = []
+        for point in [source, target]:
+            piece = self.classical_board[point.x][point.y]
+
+            if piece != NullPiece:
+                qflag |= piece.qflag
+                forced_points.append(point)
+
+        indices = []
+
+        for i in self.get_group_squares(self.get_group_roots(qflag)):
+            piece = self.qchess.get_piece(i)
+
+            if not piece.collapsed or self.qchess.get_board_point(i) in forced_points:
+                indices.append(i)
+
+        return indices
+
+    def collapse_point(self, x, y):
+        self.collapse_by_flag(self.classical_board[x][y].qflag)
+
+    def collapse_all(self):
+        self.collapse_by_flag(None, collapse_all=True)
+
+    """
+        Check if, in any of the possible positions of the pieces entangled
+        with target, target is not empty and the path is blocked at the
+        same time. This would violate double occupancy so a measurement
+        has to be performed.
+    """
+
+    def does_slide_violate_double_occupancy(self, source, target):
+        target_piece = self.classical_board[target.x][target.y]
+
+        if target_piece == NullPiece:
+            #target is always empty
+            return False
+
+        path = self.qchess.get_path_indices(source, target)
+
+        roots = self.get_group_roots(target_piece.qflag)
+        entangled_squares = set(self.get_group_squares(roots))
+
+        path_entangled = False
+
+        for index in path:
+            if self.qchess.get_piece(index) == NullPiece:
+                continue
+
+            #if a piece is blocking the path independently of the entanglement
+            #of target, then DO is violated
+            if index not in entangled_squares:
+                return True
+
+            path_entangled = True
+
+        #every qflag of the group belongs to a piece
+        number_of_pieces = sum(len(self.groups.qflags[root]) for root in roots)
+
+        #the pieces can be anywhere in the entangled squares, so one of them
+        #can be in target while another one blocks the path if there are two
+        return (
+            path_entangled and number_of_pieces >= 2 and
+            self.qchess.get_array_index(target.x, target.y) in entangled_squares)
+
+    def standard_move(self, source, target, force=False):
+        piece = self.classical_board[source.x][source.y]
+
+        if not force and piece.type == PieceType.PAWN:
+            return self._standard_pawn_move(source, target)
+
+        target_piece = self.classical_board[target.x][target.y]
+
+        if target_piece == NullPiece and piece.collapsed and (
+            not piece.is_move_slide() or self.qchess.is_path_empty(source, target)
+        ):
+            self.move_classically(source, target)
+
+        elif target_piece == NullPiece or target_piece == piece:
+            if piece.is_move_slide():
+                if self.entangle_path_flags(piece.qflag, source, target):
+                    piece.collapsed = False
+
+                    #if something may be blocking then the piece might stay in place
+                    #so we don't want to remove it clasically
+                    if target_piece == NullPiece:
+                        target_piece = piece
+
+                self.utils.perform_standard_slide(self, source, target)
+            else:
+                self.utils.perform_standard_jump(self, source, target)
+
+            self.place_piece(source, target_piece.copy())
+            self.place_piece(target, piece.copy())
+        else:
+            if target_piece.color == piece.color:
+                self.collapse_by_flag(target_piece.qflag)
+
+                if (
+                    self.classical_board[source.x][source.y] != NullPiece and
+                    self.classical_board[target.x][target.y] == NullPiece
+                ):
+                    new_source_piece = NullPiece
+
+                    if piece.collapsed and (
+                        not piece.is_move_slide() or self.qchess.is_path_empty(source, target)
+                    ):
+                        self.move_classically(source, target)
+                        return
+
+                    if piece.is_move_slide():
+                        if self.entangle_path_flags(piece.qflag, source, target):
+                            #if something may be blocking then the piece might stay in place
+                            #so we don't want to remove it clasically
+                            piece.collapsed = False
+                            new_source_piece = piece
+
+                        self.utils.perform_standard_slide(self, source, target)
+                    else:
+                        self.utils.perform_standard_jump(self, source, target)
+
+                    self.place_piece(source, new_source_piece.copy())
+                    self.place_piece(target, piece.copy())
+            else:
+                self.collapse_by_flag(piece.qflag)
+
+                if self.classical_board[source.x][source.y] != NullPiece:
+                    path_empty = self.qchess.is_path_empty(source, target)
+
+                    #if the path is empty the move is just a jump
+                    if piece.is_move_slide() and not path_empty:
+                        """
+                            Afer perform_capture_slide the path is collapsed
+                            already unless does_slide_violate_double_occupancy returns 0,
+                            in which case entanglement occurs.
+                            We call collapse_path to update the classical board.
+                        """
+                        if self.utils.perform_capture_slide(self, source, target):
+                            if self.does_slide_violate_double_occupancy(source, target):
+                                path_clear = self.collapse_path(
+                                    source, target, collapse_source=True)
+
+                                if path_clear and self.classical_board[source.x][source.y] == NullPiece:
+                                    self.place_piece(target, piece.copy())
+                            else:
+                                if not self.entangle_path_flags(piece.qflag, source, target):
+                                    self.place_piece(source, NullPiece)
+                                else:
+                                    piece.collapsed = False
+
+                                self.place_piece(target, piece.copy())
+                        else:
+                            path_clear = self.collapse_path(
+                                source, target, collapse_source=True)
+
+                            if path_clear and self.classical_board[source.x][source.y] == NullPiece:
+                                self.place_piece(target, piece.copy())
+                    elif self.classical_board[target.x][target.y].collapsed:
+                        #the piece was collapsed above
+                        self.move_classically(source, target)
+                    else:
+                        self.utils.perform_capture_jump(self, source, target)
+
+                        self.place_piece(source, NullPiece)
+                        self.place_piece(target, piece.copy())
+
+    def _standard_pawn_move(self, source, target):
+        pawn = self.classical_board[source.x][source.y]
+        target_piece = self.classical_board[target.x][target.y]
+
+        move_type, ep_point = pawn.is_move_valid(
+            source, target, qchess=self.qchess)
+
+        #this is checked in QChess class
+        assert(move_type != Pawn.MoveType.INVALID)
+
+        if (
+            move_type == Pawn.MoveType.SINGLE_STEP or
+            move_type == Pawn.MoveType.DOUBLE_STEP
+        ):
+            self.collapse_by_flag(target_piece.qflag)
+
+            if (
+                self.classical_board[source.x][source.y] != NullPiece and
+                self.classical_board[target.x][target.y] == NullPiece
+            ):
+                if pawn.collapsed and (
+                    move_type == Pawn.MoveType.SINGLE_STEP or
+                    self.qchess.is_path_empty(source, target)
+                ):
+                    self.move_classically(source, target)
+                    return
+
+                if move_type == Pawn.MoveType.SINGLE_STEP:
+                    self.utils.perform_standard_jump(self, source, target)
+
+                    self.place_piece(source, NullPiece)
+                else:
+                    if not self.entangle_path_flags(pawn.qflag, source, target):
+                        self.place_piece(source, NullPiece)
+                    else:
+                        pawn.collapsed = False
+
+                    self.utils.perform_standard_slide(self, source, target)
+
+                self.place_piece(target, pawn.copy())
+
+        elif move_type == Pawn.MoveType.CAPTURE:
+            #pawn is the only piece that needs to collapse target when capturing
+            #because it can't move diagonally unless capturing
+            self.collapse_by_flag(pawn.qflag | target_piece.qflag)
+
+            if (
+                self.classical_board[source.x][source.y] != NullPiece and
+                self.classical_board[target.x][target.y] != NullPiece
+            ):
+                #both pieces were collapsed above
+                self.move_classically(source, target)
+
+        elif move_type == Pawn.MoveType.EN_PASSANT:
+            if target_piece == NullPiece:
+                self.utils.perform_standard_en_passant(
+                    self, source, target, ep_point)
+
+                self.place_piece(source, NullPiece)
+                self.place_piece(target, pawn)
+                self.place_piece(ep_point, NullPiece)
+
+            elif target_piece.color == pawn.color:
+                self.collapse_by_flag(target_piece.qflag)
+
+                if self.classical_board[target.x][target.y] == NullPiece:
+                    self.utils.perform_standard_en_passant(
+                        self, source, target, ep_point)
+
+                    self.place_piece(source, NullPiece)
+                    self.place_piece(target, pawn.copy())
+                    self.place_piece(ep_point, NullPiece)
+            else:
+                self.collapse_by_flag(pawn.qflag)
+
+                if self.classical_board[source.x][source.y] != NullPiece:
+                    self.utils.perform_capture_en_passant(
+                        self, source, target, ep_point)
+
+                    self.place_piece(source, NullPiece)
+                    self.place_piece(target, pawn.copy())
+                    self.place_piece(ep_point, NullPiece)
+
+    def split_move(self, source, target1, target2):
+        piece = self.classical_board[source.x][source.y]
+        target_piece1 = self.classical_board[target1.x][target1.y]
+        target_piece2 = self.classical_board[target2.x][target2.y]
+
+        #the source piece is always swapped with the target2
+        #so unless the path is blocked we know what piece target2 has
+        new_source_piece = target_piece2
+
+        if piece.is_move_slide():
+            self.utils.perform_split_slide(self, source, target1, target2)
+
+            path1_blocked = self.entangle_path_flags(
+                piece.qflag, source, target1)
+            path2_blocked = self.entangle_path_flags(
+                piece.qflag, source, target2)
+
+            #set the source piece to null if any of the paths is not blocked,
+            #since the piece will always slide through that one if the other is blocked
+            if path1_blocked and path2_blocked and new_source_piece == NullPiece:
+                new_source_piece = piece
+                new_source_piece.collapsed = False
+        else:
+            self.utils.perform_split_jump(self, source, target1, target2)
+
+        if not piece.collapsed or not target_piece1.collapsed:
+            #entangle only the pieces affected by iSwap_sqrt
+            self.entangle_flags(piece.qflag, target_piece1.qflag)
+
+        if target_piece1 == NullPiece:
+            self.place_piece(target1, piece.copy())
+
+        self.place_piece(target2, piece.copy())
+        self.place_piece(source, new_source_piece.copy())
+
+        #only uncollapse the pieces if state |t1, t2> is not |00> or |11>
+        #because iSwap_sqrt leaves these states untouched
+        if target_piece1 == NullPiece:
+            self.set_piece_uncollapsed(target1)
+            self.set_piece_uncollapsed(target2)
+
+    def merge_move(self, source1, source2, target):
+        piece1 = self.classical_board[source1.x][source1.y]
+        piece2 = self.classical_board[source2.x][source2.y]
+        target_piece = self.classical_board[target.x][target.y]
+
+        #the target piece is always swapped with the source2
+        #so unless the path is blocked we know what piece source2 has
+        new_source2_piece = target_piece
+
+        if piece1.is_move_slide():
+            self.utils.perform_merge_slide(self, source1, source2, target)
+
+            self.entangle_path_flags(piece1.qflag, source1, target)
+            path2_blocked = self.entangle_path_flags(
+                piece2.qflag, source2, target)
+
+            if path2_blocked and new_source2_piece == NullPiece:
+                new_source2_piece = piece1
+                new_source2_piece.collapsed = False
+        else:
+            self.utils.perform_merge_jump(self, source1, source2, target)
+
+        if not piece1.collapsed or not piece2.collapsed:
+            #entangle only the pieces affected by iSwap_sqrt
+            self.entangle_flags(piece1.qflag, piece2.qflag)
+
+        if target_piece == NullPiece:
+            self.place_piece(target, piece1.copy())
+
+        self.place_piece(source1, piece2.copy())
+        self.place_piece(source2, new_source2_piece.copy())
+
+        if target_piece == NullPiece:
+            self.set_piece_uncollapsed(source1)
+            self.set_piece_uncollapsed(target)
+
+    def castling_move(self, king_source, rook_source, king_target, rook_target):
+        king = self.classical_board[king_source.x][king_source.y]
+        rook = self.classical_board[rook_source.x][rook_source.y]
+
+        king_target_piece = self.classical_board[king_target.x][king_target.y]
+        rook_target_piece = self.classical_board[rook_target.x][rook_target.y]
+
+        #collapse target pieces
+        self.collapse_by_flag(king_target_piece.qflag |
+                              rook_target_piece.qflag)
+
+        #if both targets are empty
+        if (
+            self.classical_board[king_target.x][king_target.y] == NullPiece and
+            self.classical_board[rook_target.x][rook_target.y] == NullPiece
+        ):
+            #the path doesn't neccesarily have to be the shortest straight path
+            #between king and rook
+            king_path = self.qchess.get_path_points(king_source, king_target)
+            rook_path = self.qchess.get_path_points(rook_source, rook_target)
+
+            # in general it's the unique combination of their paths
+            path = []
+            for point in king_path + rook_path:
+                if point == king_target or point == rook_target:
+                    continue
+
+                #we don't need to include empty squares
+                if self.classical_board[point.x][point.y] == NullPiece:
+                    continue
+
+                if not point in path:
+                    path.append(point)
+
+            #exclude king_target and rook_target just in case
+            if king_target in path:
+                path.remove(king_target)
+            if rook_target in path:
+                path.remove(rook_target)
+
+            #perform the quantum move
+            self.utils.perform_castle(
+                self, king_source, rook_source, king_target, rook_target, path)
+
+            if not path:
+                #remove from source only if path is empty
+                self.place_piece(king_source, NullPiece)
+                self.place_piece(rook_source, NullPiece)
+            else:
+                #entangle with all the pieces in the path
+                path_qflags = 0
+                for point in path:
+                    path_qflags |= self.classical_board[point.x][point.y].qflag
+
+                self.entangle_flags(king.qflag, rook.qflag)
+                self.entangle_flags(path_qflags, king.qflag)
+
+                king.collapsed = False
+                rook.collapsed = False
+
+            self.place_piece(king_target, king.copy())
+            self.place_piece(rook_target, rook.copy())
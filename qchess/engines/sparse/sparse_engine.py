@@ -0,0 +1,18 @@
+from .sparse_state import SparseState
+
+from qchess.engines.statevector.statevector_engine import StatevectorEngine
+
+
+"""
+Same as StatevectorEngine, but only the basis states with a nonzero
+amplitude are stored (see SparseState).
+"""
+
+
+class SparseEngine(StatevectorEngine):
+    state_class = SparseState
+
+    @classmethod
+    def is_board_too_large(cls, width, height):
+        #memory depends on the number of branches, not on the board
+        return False
@@ -0,0 +1,146 @@
+import copy
+import math
+
+import numpy as np
+
+from qchess.engines.statevector import sutils
+
+"""
+Board state stored as a dict from basis state to amplitude.
+Bit i of a basis state is the square with array index i, and only the
+basis states with a nonzero amplitude are stored, so the cost of every
+operation depends on the number of branches instead of the board size.
+"""
+
+
+class SparseState:
+    def __init__(self, num_qubits, rng):
+        self.num_qubits = num_qubits
+        self.rng = rng
+
+        self.amplitudes = {0: 1}
+
+    #same as DenseState.save, every basis state is stored as little endian bytes
+    def save(self):
+        num_bytes = (self.num_qubits + 7) // 8
+
+        basis = np.zeros((len(self.amplitudes), num_bytes), dtype=np.uint8)
+        for i, state in enumerate(self.amplitudes):
+            basis[i] = list(state.to_bytes(num_bytes, 'little'))
+
+        return {'num_qubits': self.num_qubits}, {
+            'basis': basis,
+            'amplitudes': np.array(list(self.amplitudes.values()), dtype=complex)
+        }
+
+    @classmethod
+    def load(cls, info, arrays, rng):
+        state = cls(info['num_qubits'], rng)
+        state.amplitudes = {
+            int.from_bytes(bytes(basis), 'little'): complex(amplitude)
+            for basis, amplitude in zip(arrays['basis'], arrays['amplitudes'])}
+
+        return state
+
+    #same as DenseState.probabilities
+    def probabilities(self, qubits):
+        probabilities = [0.0] * len(qubits)
+
+        for basis, amplitude in self.amplitudes.items():
+            probability = abs(amplitude) ** 2
+
+            for j, qubit in enumerate(qubits):
+                if basis >> qubit & 1:
+                    probabilities[j] += probability
+
+        return probabilities
+
+    #same as DenseState.fork, the amplitudes are always replaced by a new dict
+    def fork(self, rng):
+        state = copy.copy(self)
+        state.rng = rng
+
+        return state
+
+    def x(self, qubit):
+        mask = 1 << qubit
+
+        self.amplitudes = {
+            basis ^ mask: amplitude for basis, amplitude in self.amplitudes.items()}
+
+    def iswap(self, qubit1, qubit2):
+        mask = (1 << qubit1) | (1 << qubit2)
+
+        amplitudes = {}
+
+        for basis, amplitude in self.amplitudes.items():
+            #only |01> and |10> are swapped
+            if bool(basis & (1 << qubit1)) != bool(basis & (1 << qubit2)):
+                amplitudes[basis ^ mask] = 1j * amplitude
+            else:
+                amplitudes[basis] = amplitude
+
+        self.amplitudes = amplitudes
+
+    def iswap_sqrt(self, qubit1, qubit2):
+        mask = (1 << qubit1) | (1 << qubit2)
+
+        amplitudes = {}
+
+        for basis, amplitude in self.amplitudes.items():
+            if bool(basis & (1 << qubit1)) != bool(basis & (1 << qubit2)):
+                swapped = basis ^ mask
+
+                amplitudes[basis] = amplitudes.get(
+                    basis, 0) + amplitude / math.sqrt(2)
+                amplitudes[swapped] = amplitudes.get(
+                    swapped, 0) + 1j * amplitude / math.sqrt(2)
+            else:
+                amplitudes[basis] = amplitudes.get(basis, 0) + amplitude
+
+        #remove the branches that cancelled out
+        self.amplitudes = {
+            basis: amplitude for basis, amplitude in amplitudes.items()
+            if abs(amplitude) ** 2 > sutils.EPSILON}
+
+    #keep only the basis states for which key returns outcome
+    def _project(self, key, outcome, probability):
+        self.amplitudes = {
+            basis: amplitude / math.sqrt(probability)
+            for basis, amplitude in self.amplitudes.items()
+            if key(basis) == outcome}
+
+    #sample the value of key(basis state) and project to it
+    def _measure_key(self, key):
+        probabilities = {}
+
+        for basis, amplitude in self.amplitudes.items():
+            outcome = key(basis)
+            probabilities[outcome] = probabilities.get(
+                outcome, 0) + abs(amplitude) ** 2
+
+        outcomes = list(probabilities.keys())
+        index = sutils.sample(
+            self.rng, np.array([probabilities[outcome] for outcome in outcomes]))
+
+        self._project(key, outcomes[index], probabilities[outcomes[index]])
+
+        return outcomes[index]
+
+    def _get_values(self, basis, qubits):
+        return tuple(bool(basis & (1 << qubit)) for qubit in qubits)
+
+    #measure the qubits, returns a list of bools in the same order
+    def measure(self, qubits):
+        return list(self._measure_key(
+            lambda basis: self._get_values(basis, qubits)))
+
+    #same as DenseState.measure_outcome
+    def measure_outcome(self, qubits, key):
+        return self._measure_key(
+            lambda basis: key(*self._get_values(basis, qubits)))
+
+    #same as DenseState.measure_predicate
+    def measure_predicate(self, qubits, predicate):
+        return self.measure_outcome(
+            qubits, lambda *values: bool(predicate(*values)))
@@ -0,0 +1,273 @@
+import copy
+import itertools
+import math
+
+import numpy as np
+
+from . import sutils
+
+"""
+Statevector of the whole board, one qubit per square.
+Qubit i is the bit i of the amplitude index (same order as qiskit).
+
+X and iSwap take a basis state to another one (times a phase), and so
+does iSwap_sqrt when both qubits are equal. While only those gates are
+applied the state is kept as that basis state, and the amplitudes are
+allocated when the first superposition is created.
+"""
+
+
+class DenseState:
+    def __init__(self, num_qubits, rng):
+        self.num_qubits = num_qubits
+        self.rng = rng
+
+        #the state is phase * |basis> while amplitudes is None
+        self.basis = 0
+        self.phase = 1
+        self.amplitudes = None
+
+    #switch to the full statevector
+    def _allocate(self):
+        if self.amplitudes is None:
+            self.amplitudes = np.zeros(2 ** self.num_qubits, dtype=complex)
+            self.amplitudes[self.basis] = self.phase
+
+    #the amplitudes may be shared with a fork (see fork), copy them before changing them in place
+    def _own_amplitudes(self):
+        if not self.amplitudes.flags.writeable:
+            self.amplitudes = self.amplitudes.copy()
+
+    #value of the qubit in the basis state
+    def _bit(self, qubit):
+        return bool(self.basis >> qubit & 1)
+
+    #view with one axis of length 2 per qubit
+    def _view(self):
+        return self.amplitudes.reshape((2,) * self.num_qubits)
+
+    #qubit 0 is the least significant bit, so it's the last axis
+    def _axis(self, qubit):
+        return self.num_qubits - 1 - qubit
+
+    #index of the view that fixes the value of some qubits
+    def _index(self, values):
+        index = [slice(None)] * self.num_qubits
+
+        for qubit, value in values.items():
+            index[self._axis(qubit)] = value
+
+        return tuple(index)
+
+    def x(self, qubit):
+        if self.amplitudes is None:
+            self.basis ^= 1 << qubit
+            return
+
+        view = self._view()
+        self.amplitudes = np.flip(view, axis=self._axis(qubit)).reshape(-1)
+
+    def iswap(self, qubit1, qubit2):
+        if self.amplitudes is None:
+            if self._bit(qubit1) != self._bit(qubit2):
+                self.basis ^= 1 << qubit1 | 1 << qubit2
+                self.phase *= 1j
+
+            return
+
+        self._own_amplitudes()
+
+        view = self._view()
+        index01 = self._index({qubit1: 1, qubit2: 0})
+        index10 = self._index({qubit1: 0, qubit2: 1})
+
+        amplitudes01 = view[index01].copy()
+        view[index01] = 1j * view[index10]
+        view[index10] = 1j * amplitudes01
+
+    def iswap_sqrt(self, qubit1, qubit2):
+        if self.amplitudes is None:
+            #|00> and |11> are left untouched
+            if self._bit(qubit1) == self._bit(qubit2):
+                return
+
+            self._allocate()
+
+        self._own_amplitudes()
+
+        view = self._view()
+        index01 = self._index({qubit1: 1, qubit2: 0})
+        index10 = self._index({qubit1: 0, qubit2: 1})
+
+        amplitudes01 = view[index01].copy()
+        amplitudes10 = view[index10].copy()
+
+        view[index01] = (amplitudes01 + 1j * amplitudes10) / math.sqrt(2)
+        view[index10] = (1j * amplitudes01 + amplitudes10) / math.sqrt(2)
+
+    """
+    Copy of the state that measures with rng.
+    The amplitudes are shared until either state changes them: they are made
+    read only, and the gates that change them in place copy them first.
+    """
+    def fork(self, rng):
+        state = copy.copy(self)
+        state.rng = rng
+
+        if self.amplitudes is not None:
+            self.amplitudes.flags.writeable = False
+
+        return state
+
+    """
+    Information needed to restore the state, as a dict that can be stored
+    as json and a dict of numpy arrays (see qchess.save).
+    """
+    def save(self):
+        if self.amplitudes is None:
+            return {
+                'num_qubits': self.num_qubits,
+                'basis': self.basis,
+                'phase': [complex(self.phase).real, complex(self.phase).imag]
+            }, {}
+
+        return {'num_qubits': self.num_qubits}, {'amplitudes': self.amplitudes}
+
+    @classmethod
+    def load(cls, info, arrays, rng):
+        state = cls(info['num_qubits'], rng)
+
+        if 'basis' in info:
+            state.basis = info['basis']
+            state.phase = complex(*info['phase'])
+        else:
+            state.amplitudes = arrays['amplitudes']
+
+        return state
+
+    #state of both systems, with the qubits of other after the ones of self
+    def tensor(self, other):
+        state = DenseState(0, self.rng)
+        state.num_qubits = self.num_qubits + other.num_qubits
+
+        if self.amplitudes is None and other.amplitudes is None:
+            state.basis = self.basis | other.basis << self.num_qubits
+            state.phase = self.phase * other.phase
+        else:
+            self._allocate()
+            other._allocate()
+            state.amplitudes = np.kron(other.amplitudes, self.amplitudes)
+
+        return state
+
+    #remove a qubit that is known to hold value
+    def remove_qubit(self, qubit, value):
+        if self.amplitudes is None:
+            low = self.basis & ((1 << qubit) - 1)
+            self.basis = low | self.basis >> (qubit + 1) << qubit
+            self.num_qubits -= 1
+            return
+
+        amplitudes = self._view()[self._index({qubit: int(value)})]
+
+        self.num_qubits -= 1
+        self.amplitudes = amplitudes.reshape(-1) / np.linalg.norm(amplitudes)
+
+    #probability of the qubit being |1>
+    def probability(self, qubit):
+        if self.amplitudes is None:
+            return float(self._bit(qubit))
+
+        return float(self._marginal([qubit])[1])
+
+    #probability of every qubit being |1>, in the same order
+    def probabilities(self, qubits):
+        if self.amplitudes is None:
+            return [float(self._bit(qubit)) for qubit in qubits]
+
+        view = np.abs(self._view()) ** 2
+        return [float(np.sum(view[self._index({qubit: 1})])) for qubit in qubits]
+
+    #probabilities of the qubits, with axis j corresponding to qubits[j]
+    def _marginal(self, qubits):
+        axes = [self._axis(qubit) for qubit in qubits]
+        other_axes = tuple(
+            axis for axis in range(self.num_qubits) if axis not in axes)
+
+        marginal = np.sum(np.abs(self._view()) ** 2, axis=other_axes)
+
+        #the remaining axes are sorted, move them to the order of qubits
+        sorted_axes = sorted(axes)
+        return np.transpose(marginal, [sorted_axes.index(axis) for axis in axes])
+
+    #keep only the amplitudes allowed by mask (with axis j corresponding to qubits[j])
+    def _project(self, qubits, mask, probability):
+        axes = [self._axis(qubit) for qubit in qubits]
+
+        mask = mask.reshape(mask.shape + (1,) * (self.num_qubits - len(qubits)))
+        mask = np.moveaxis(mask, range(len(qubits)), axes)
+
+        self.amplitudes = (self._view() * mask).reshape(-1) / math.sqrt(probability)
+
+    #measure the qubits, returns a list of bools in the same order
+    def measure(self, qubits):
+        #a basis state is left as it is
+        if self.amplitudes is None:
+            return [self._bit(qubit) for qubit in qubits]
+
+        marginal = self._marginal(qubits)
+
+        outcome = sutils.sample(self.rng, marginal.reshape(-1))
+        values = np.unravel_index(outcome, marginal.shape)
+
+        mask = np.zeros(marginal.shape, dtype=bool)
+        mask[values] = True
+
+        self._project(qubits, mask, marginal[values])
+
+        return [bool(value) for value in values]
+
+    """
+    Sample the outcome of key(*values) for the values of the qubits, and keep
+    only the amplitudes with that outcome. The qubits themselves are not
+    measured, unless the outcome tells their values.
+    The key receives one bool per qubit, in the same order, and returns
+    a hashable outcome.
+    """
+    def measure_outcome(self, qubits, key):
+        if not qubits:
+            return key()
+
+        if self.amplitudes is None:
+            return key(*[self._bit(qubit) for qubit in qubits])
+
+        marginal = self._marginal(qubits)
+
+        #values of the qubits for every outcome
+        outcomes = {}
+        for values in itertools.product((0, 1), repeat=len(qubits)):
+            outcome = key(*[bool(value) for value in values])
+            outcomes.setdefault(outcome, []).append(values)
+
+        keys = list(outcomes.keys())
+        probabilities = np.array(
+            [sum(marginal[values] for values in outcomes[outcome]) for outcome in keys])
+
+        index = sutils.sample(self.rng, probabilities)
+
+        mask = np.zeros(marginal.shape, dtype=bool)
+        for values in outcomes[keys[index]]:
+            mask[values] = True
+
+        self._project(qubits, mask, probabilities[index])
+
+        return keys[index]
+
+    """
+    Measure if the value of the qubits satisfies the predicate, without
+    measuring the qubits themselves.
+    The predicate receives one bool per qubit, in the same order.
+    """
+    def measure_predicate(self, qubits, predicate):
+        return self.measure_outcome(
+            qubits, lambda *values: bool(predicate(*values)))
@@ -0,0 +1,253 @@
+import numpy as np
+
+from . import sutils
+from .dense_state import DenseState
+
+"""
+Board state split into independent entanglement groups.
+Each group holds a DenseState with only its squares, and the squares
+that don't belong to any group are stored as classical bits.
+Groups are joined (tensor product) only when a gate or a measured
+condition involves more than one of them, and squares leave their group
+as soon as their value is known, so the memory needed depends on the
+size of the largest group instead of the size of the board.
+"""
+
+
+class _Group:
+    def __init__(self, qubits, state):
+        #the ith local qubit of the state is the square qubits[i]
+        self.qubits = qubits
+        self.state = state
+
+    def local(self, qubit):
+        return self.qubits.index(qubit)
+
+
+class FactorizedState:
+    def __init__(self, num_qubits, rng):
+        self.num_qubits = num_qubits
+        self.rng = rng
+
+        #value of the squares that don't belong to a group
+        self.values = [False] * num_qubits
+
+        #group of every square, None if the square is classical
+        self.groups = [None] * num_qubits
+
+    def _single_qubit_state(self, value):
+        state = DenseState(1, self.rng)
+        if value:
+            state.x(0)
+
+        return state
+
+    #join the groups of all the qubits (classical qubits included) in a single group
+    def _join(self, qubits):
+        group = None
+
+        for qubit in qubits:
+            other = self.groups[qubit]
+
+            if other is None:
+                other = _Group([qubit], self._single_qubit_state(self.values[qubit]))
+                self.groups[qubit] = other
+
+            if group is None:
+                group = other
+
+            elif other is not group:
+                group.state = group.state.tensor(other.state)
+                group.qubits += other.qubits
+
+                for other_qubit in other.qubits:
+                    self.groups[other_qubit] = group
+
+        return group
+
+    def _remove_from_group(self, qubit, value):
+        group = self.groups[qubit]
+
+        group.state.remove_qubit(group.local(qubit), value)
+        group.qubits.remove(qubit)
+
+        self.groups[qubit] = None
+        self.values[qubit] = value
+
+    #move out of their group the qubits that have a definite value
+    def _factor_out(self, qubits):
+        for qubit in qubits:
+            group = self.groups[qubit]
+            if group is None:
+                continue
+
+            probability = group.state.probability(group.local(qubit))
+
+            if probability < sutils.EPSILON:
+                self._remove_from_group(qubit, False)
+            elif probability > 1 - sutils.EPSILON:
+                self._remove_from_group(qubit, True)
+
+    #same as DenseState.probabilities, every group is used once
+    def probabilities(self, qubits):
+        probabilities = [float(self.values[qubit]) for qubit in qubits]
+
+        groups = {}
+        for j, qubit in enumerate(qubits):
+            group = self.groups[qubit]
+            if group is not None:
+                groups.setdefault(id(group), (group, []))[1].append(j)
+
+        for group, positions in groups.values():
+            values = group.state.probabilities(
+                [group.local(qubits[j]) for j in positions])
+
+            for j, probability in zip(positions, values):
+                probabilities[j] = probability
+
+        return probabilities
+
+    #same as DenseState.fork, every group is forked once
+    def fork(self, rng):
+        state = FactorizedState(self.num_qubits, rng)
+        state.values = list(self.values)
+
+        groups = {}
+        for qubit, group in enumerate(self.groups):
+            if group is None:
+                continue
+
+            if id(group) not in groups:
+                groups[id(group)] = _Group(list(group.qubits), group.state.fork(rng))
+
+            state.groups[qubit] = groups[id(group)]
+
+        return state
+
+    #same as DenseState.save, the arrays of every group start with 'group<i>.'
+    def save(self):
+        groups = []
+        arrays = {'values': np.array(self.values, dtype=bool)}
+
+        for group in self.groups:
+            if group is None or any(group is other for other in groups):
+                continue
+
+            groups.append(group)
+
+        info = {'num_qubits': self.num_qubits, 'groups': []}
+
+        for i, group in enumerate(groups):
+            state_info, state_arrays = group.state.save()
+            info['groups'].append({'qubits': group.qubits, 'state': state_info})
+
+            for name, array in state_arrays.items():
+                arrays['group{}.{}'.format(i, name)] = array
+
+        return info, arrays
+
+    @classmethod
+    def load(cls, info, arrays, rng):
+        state = cls(info['num_qubits'], rng)
+        state.values = [bool(value) for value in arrays['values']]
+
+        for i, group_info in enumerate(info['groups']):
+            prefix = 'group{}.'.format(i)
+            state_arrays = {
+                name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+            group = _Group(list(group_info['qubits']), DenseState.load(
+                group_info['state'], state_arrays, rng))
+
+            for qubit in group.qubits:
+                state.groups[qubit] = group
+
+        return state
+
+    def x(self, qubit):
+        group = self.groups[qubit]
+
+        if group is None:
+            self.values[qubit] = not self.values[qubit]
+        else:
+            group.state.x(group.local(qubit))
+
+    def iswap(self, qubit1, qubit2):
+        if self.groups[qubit1] is None and self.groups[qubit2] is None:
+            #the phase is global since both values are known
+            self.values[qubit1], self.values[qubit2] = \
+                self.values[qubit2], self.values[qubit1]
+            return
+
+        group = self._join([qubit1, qubit2])
+        group.state.iswap(group.local(qubit1), group.local(qubit2))
+
+        self._factor_out([qubit1, qubit2])
+
+    def iswap_sqrt(self, qubit1, qubit2):
+        if (
+            self.groups[qubit1] is None and self.groups[qubit2] is None and
+            self.values[qubit1] == self.values[qubit2]
+        ):
+            #|00> and |11> are left untouched
+            return
+
+        group = self._join([qubit1, qubit2])
+        group.state.iswap_sqrt(group.local(qubit1), group.local(qubit2))
+
+        self._factor_out([qubit1, qubit2])
+
+    def measure(self, qubits):
+        #groups are independent, so each one can be measured on its own
+        measured_groups = []
+        for qubit in qubits:
+            group = self.groups[qubit]
+            if group is not None and group not in measured_groups:
+                measured_groups.append(group)
+
+        for group in measured_groups:
+            group_qubits = [
+                qubit for qubit in qubits if self.groups[qubit] is group]
+            values = group.state.measure(
+                [group.local(qubit) for qubit in group_qubits])
+
+            for qubit, value in zip(group_qubits, values):
+                self._remove_from_group(qubit, value)
+
+            #the rest of the group may be known now too
+            self._factor_out(list(group.qubits))
+
+        return [self.values[qubit] for qubit in qubits]
+
+    """
+    Same as DenseState.measure_outcome.
+    Only the groups of the qubits are joined, classical values are
+    passed to the key directly.
+    """
+    def measure_outcome(self, qubits, key):
+        group_qubits = [
+            qubit for qubit in qubits if self.groups[qubit] is not None]
+
+        if not group_qubits:
+            return key(*[self.values[qubit] for qubit in qubits])
+
+        group = self._join(group_qubits)
+
+        def group_key(*group_values):
+            values = dict(zip(group_qubits, group_values))
+
+            return key(*[
+                values[qubit] if qubit in values else self.values[qubit]
+                for qubit in qubits])
+
+        result = group.state.measure_outcome(
+            [group.local(qubit) for qubit in group_qubits], group_key)
+
+        self._factor_out(list(group.qubits))
+
+        return result
+
+    #same as DenseState.measure_predicate
+    def measure_predicate(self, qubits, predicate):
+        return self.measure_outcome(
+            qubits, lambda *values: bool(predicate(*values)))
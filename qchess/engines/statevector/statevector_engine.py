@@ -0,0 +1,88 @@
+import numpy as np
+
+from . import sutils
+from .dense_state import DenseState
+from .factorized_state import FactorizedState
+
+from qchess.piece import NullPiece
+
+from qchess.engines.sampler import Sampler
+from qchess.engines.simulation_engine import SimulationEngine
+
+
+class StatevectorEngine(SimulationEngine):
+    utils = sutils
+    state_class = DenseState
+
+    def __init__(self, qchess, width, height, seed=None):
+        #every measurement is sampled from it, so a seed replays the same game
+        self.rng = Sampler(np.random.default_rng(seed))
+
+        super().__init__(qchess, width, height)
+
+    def reset_state(self):
+        self.state = self.create_state()
+
+        #populate the qubits if pieces already exist
+        for i in range(self.width * self.height):
+            if self.qchess.get_piece(i) != NullPiece:
+                self.state.x(i)
+
+    #empty state of the board, one qubit per square
+    def create_state(self):
+        return self.state_class(self.width * self.height, self.rng)
+
+    def save_state(self):
+        info, arrays = super().save_state()
+        info['state'], arrays = self.state.save()
+
+        return info, arrays
+
+    def load_state(self, info, arrays):
+        super().load_state(info, arrays)
+        self.state = self.state_class.load(info['state'], arrays, self.rng)
+
+    def fork(self, qchess):
+        engine = super().fork(qchess)
+        engine.state = self.state.fork(engine.rng)
+
+        return engine
+
+    def get_qubit(self, x, y):
+        index = self.qchess.get_array_index(x, y)
+        self.apply_pending_flip(index)
+
+        return index
+
+    def prepare_piece(self, x, y):
+        self.state.x(self.get_qubit(x, y))
+
+    def flip_square(self, index):
+        self.state.x(index)
+
+    def get_square_probabilities(self, indices):
+        return self.state.probabilities(indices)
+
+    def measure_squares(self, indices):
+        #squares measured together with an earlier measurement of the move
+        values = self.take_premeasured(indices)
+
+        if values is not None:
+            return values
+
+        return self.state.measure(indices)
+
+
+"""
+Same as StatevectorEngine, but every entanglement group is simulated
+on its own (see FactorizedState).
+"""
+
+
+class FactorizedEngine(StatevectorEngine):
+    state_class = FactorizedState
+
+    @classmethod
+    def is_board_too_large(cls, width, height):
+        #memory depends on the largest entanglement group, not on the board
+        return False
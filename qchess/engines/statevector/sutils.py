@@ -0,0 +1,266 @@
+import math
+import os
+
+import numpy as np
+
+"""
+The gates are applied directly to the state of the engine, so every
+ancilla used by the circuits in qutils is replaced by a measurement.
+An ancilla that holds a condition and is discarded afterwards without
+being uncomputed leaves the board in the same (mixed) state as measuring
+the condition and applying the gates classically.
+"""
+
+
+def _get_max_qubit_memory():
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        #a safe default for systems without sysconf
+        return 26
+
+    #each amplitude is a complex128 (16 bytes)
+    return int(math.log2(memory / 16))
+
+
+MAX_QUBIT_MEMORY = _get_max_qubit_memory()
+
+#probabilities below this value are considered rounding errors
+EPSILON = 1e-10
+
+
+#choose an outcome from an array of (non normalized) probabilities
+def sample(rng, probabilities):
+    probabilities = np.where(probabilities < EPSILON, 0, probabilities)
+    probabilities = probabilities / probabilities.sum()
+
+    return int(rng.choice(len(probabilities), p=probabilities))
+
+
+def _all_empty(*squares):
+    return not any(squares)
+
+
+def _all_occupied(*squares):
+    return all(squares)
+
+
+#qubits that decide if the path is clear (see SimulationEngine.get_path_controls)
+def _get_path_qubits(engine, points):
+    qubits = []
+
+    for point in engine.get_path_controls(points):
+        qubits.append(engine.get_qubit(point.x, point.y))
+
+    return qubits
+
+
+#qubits without repetitions, in the same order
+def _unique(qubits):
+    return list(dict.fromkeys(qubits))
+
+
+#measure if the qubit holds a piece and remove it from the board if it does
+def _capture(engine, qubit):
+    if engine.state.measure([qubit])[0]:
+        engine.state.x(qubit)
+
+
+def perform_standard_jump(engine, source, target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    engine.state.iswap(qsource, qtarget)
+
+
+def perform_capture_jump(engine, source, target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    _capture(engine, qtarget)
+    engine.state.iswap(qsource, qtarget)
+
+
+def perform_split_jump(engine, source, target1, target2):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget1 = engine.get_qubit(target1.x, target1.y)
+    qtarget2 = engine.get_qubit(target2.x, target2.y)
+
+    engine.state.iswap_sqrt(qtarget1, qsource)
+    engine.state.iswap(qsource, qtarget2)
+
+
+def perform_merge_jump(engine, source1, source2, target):
+    qsource1 = engine.get_qubit(source1.x, source1.y)
+    qsource2 = engine.get_qubit(source2.x, source2.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    engine.state.iswap(qtarget, qsource2)
+    engine.state.iswap_sqrt(qsource1, qtarget)
+
+
+def perform_standard_slide(engine, source, target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    path = _get_path_qubits(
+        engine, engine.qchess.get_path_points(source, target))
+
+    if engine.state.measure_predicate(path, _all_empty):
+        engine.state.iswap(qsource, qtarget)
+
+
+"""
+    *The source piece has already been collapsed before this is called*
+    Same condition as qutils.perform_capture_slide, the piece can capture if:
+        -The path is clear (doesn't matter if target is empty or not)
+                        OR
+        -The path is not clear but the target is empty
+"""
+
+
+def perform_capture_slide(engine, source, target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+
+    path = _get_path_qubits(
+        engine, engine.qchess.get_path_points(source, target))
+
+    #the squares the engine collapses after this if the condition is false,
+    #or always if double occupancy is violated (see qutils.perform_capture_slide)
+    collapse_indices = engine.get_capture_collapse_indices(source, target)
+    always_collapse = engine.does_slide_violate_double_occupancy(source, target)
+
+    qubits = _unique(path + [qtarget] + collapse_indices)
+
+    #everything the move needs is measured in one step
+    def outcome(*values):
+        values = dict(zip(qubits, values))
+
+        path_clear = _all_empty(*[values[qubit] for qubit in path])
+        cond = path_clear or not values[qtarget]
+
+        #the target is only captured if the piece slides
+        captured = values[qtarget] if cond and path_clear else None
+
+        collapsed = None
+        if always_collapse or not cond:
+            collapsed = tuple(values[i] for i in collapse_indices)
+
+        return cond, path_clear, captured, collapsed
+
+    cond, path_clear, captured, collapsed = engine.state.measure_outcome(
+        qubits, outcome)
+
+    if cond and path_clear:
+        if captured:
+            engine.state.x(qtarget)
+
+        engine.state.iswap(qsource, qtarget)
+
+    if collapsed is not None:
+        engine.premeasured = dict(zip(collapse_indices, collapsed))
+
+        #the squares were measured before the slide, so the piece is in target now
+        if cond and path_clear:
+            engine.premeasured[qsource] = False
+            engine.premeasured[qtarget] = True
+
+    return cond
+
+
+"""
+    Same as qutils._slide_split_merge. The args (single, double1, double2) are
+        split: (source, target1, target2)
+        merge: (target, source1, source2)
+"""
+
+
+def _slide_split_merge(engine, single, double1, double2, is_split):
+    qsingle = engine.get_qubit(single.x, single.y)
+    qdouble1 = engine.get_qubit(double1.x, double1.y)
+    qdouble2 = engine.get_qubit(double2.x, double2.y)
+
+    path1 = _get_path_qubits(
+        engine, engine.qchess.get_path_points(single, double1))
+    path2 = _get_path_qubits(
+        engine, engine.qchess.get_path_points(single, double2))
+
+    #both paths are measured in one step
+    qubits = _unique(path1 + path2)
+
+    def paths_clear(*values):
+        values = dict(zip(qubits, values))
+
+        return (
+            _all_empty(*[values[qubit] for qubit in path1]),
+            _all_empty(*[values[qubit] for qubit in path2])
+        )
+
+    path1_clear, path2_clear = engine.state.measure_outcome(
+        qubits, paths_clear)
+
+    if path1_clear and path2_clear:
+        #perform the split/merge
+        if is_split:
+            engine.state.iswap_sqrt(qdouble1, qsingle)
+            engine.state.iswap(qsingle, qdouble2)
+        else:
+            engine.state.iswap(qsingle, qdouble2)
+            engine.state.iswap_sqrt(qdouble1, qsingle)
+
+    elif path1_clear:
+        #perform one jump
+        engine.state.iswap(qdouble1, qsingle)
+
+    elif path2_clear:
+        #perform the other jump
+        engine.state.iswap(qsingle, qdouble2)
+
+
+def perform_split_slide(engine, source, target1, target2):
+    _slide_split_merge(engine, source, target1, target2, is_split=True)
+
+
+def perform_merge_slide(engine, source1, source2, target):
+    _slide_split_merge(engine, target, source1, source2, is_split=False)
+
+
+def perform_standard_en_passant(engine, source, target, ep_target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+    qep_target = engine.get_qubit(ep_target.x, ep_target.y)
+
+    #only capture if both source and ep_target exist at the same time
+    if engine.state.measure_predicate([qsource, qep_target], _all_occupied):
+        engine.state.x(qep_target)
+        engine.state.iswap(qsource, qtarget)
+
+
+def perform_capture_en_passant(engine, source, target, ep_target):
+    qsource = engine.get_qubit(source.x, source.y)
+    qtarget = engine.get_qubit(target.x, target.y)
+    qep_target = engine.get_qubit(ep_target.x, ep_target.y)
+
+    #target and ep_target can't exist at the same time (see qutils)
+    def any_piece(ep_square, target_square):
+        return ep_square != target_square
+
+    if engine.state.measure_predicate([qep_target, qtarget], any_piece):
+        _capture(engine, qep_target)
+        _capture(engine, qtarget)
+        engine.state.iswap(qsource, qtarget)
+
+
+#path holds all points that must be empty for the move to be valid (excluding targets)
+def perform_castle(engine, king_source, rook_source, king_target, rook_target, path=None):
+    qking_source = engine.get_qubit(king_source.x, king_source.y)
+    qrook_source = engine.get_qubit(rook_source.x, rook_source.y)
+    qking_target = engine.get_qubit(king_target.x, king_target.y)
+    qrook_target = engine.get_qubit(rook_target.x, rook_target.y)
+
+    path_qubits = _get_path_qubits(engine, path or [])
+
+    if engine.state.measure_predicate(path_qubits, _all_empty):
+        engine.state.iswap(qking_source, qking_target)
+        engine.state.iswap(qrook_source, qrook_target)
@@ -33,6 +33,10 @@ class Piece:
         self.collapsed = True
         self.has_moved = False
 
+        #entanglement flag (a single bit) given by the engine when the piece is
+        #placed on the board, 0 until then
+        self.qflag = 0
+
     def __eq__(self, other):
         return self.type == other.type and self.color == other.color
 
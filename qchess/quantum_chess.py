@@ -1,20 +1,28 @@
 import PySimpleGUI as sg
+import copy
 import os
 import time
 
-from .engines.qiskit.qiskit_engine import QiskitEngine
 from .point import Point
 from .piece import *
 from .pawn import Pawn
+from .board_paths import get_board_paths
+from .engines import DEFAULT_ENGINE, get_engine_class, get_engine_name
 
 
 class QChess:
-    def __init__(self, width, height, game_mode=None):
+    def __init__(self, width, height, game_mode=None, engine=None, engine_options=None, seed=None):
         #default values
         self.current_turn = Color.WHITE
         self.pawn_double_step_allowed = True
         self.pawn_promotion_allowed = True
 
+        #engine name if it isn't given directly
+        engine_name = DEFAULT_ENGINE
+
+        #keyword arguments of every engine by name
+        options = {}
+
         if game_mode:
             assert('board' in game_mode)
 
@@ -31,6 +39,17 @@ class QChess:
             if 'pawn_promotion_allowed' in game_mode:
                 self.pawn_promotion_allowed = game_mode['pawn_promotion_allowed']
 
+            #some modes may need a specific simulator
+            if 'engine' in game_mode:
+                engine_name = game_mode['engine']
+
+            if 'engine_options' in game_mode:
+                options.update(game_mode['engine_options'])
+
+            #a fixed seed replays the same measurement outcomes
+            if seed is None and 'seed' in game_mode:
+                seed = game_mode['seed']
+
             height = len(game_mode['board'])
             assert(height > 0)
             width = len(game_mode['board'][0])
@@ -40,9 +59,29 @@ class QChess:
 
         self.board = [[NullPiece for y in range(height)] for x in range(width)]
 
-        #default engine is QiskitEngine
-        #TODO: Read engine from game_mode dict
-        self.engine = QiskitEngine(self, width, height)
+        #shared by every game with the same board size
+        self.paths = get_board_paths(width, height)
+
+        #engine can be a class or a name from the registry in qchess.engines,
+        #which only imports the selected one (so qiskit isn't always loaded)
+        if engine is None:
+            engine = engine_name
+
+        if isinstance(engine, str):
+            engine = get_engine_class(engine, width, height)
+
+        #the options given directly have priority over the game mode ones
+        if engine_options:
+            options.update(engine_options)
+
+        options = dict(options.get(get_engine_name(engine), {}))
+
+        #only given if set, so engines without randomness don't need the argument
+        if seed is not None:
+            options['seed'] = seed
+
+        self.seed = seed
+        self.engine = engine(self, width, height, **options)
 
         #holds the position of the captureable en passant pawn
         #none if the last move wasn't a pawn's double step
@@ -96,6 +135,21 @@ class QChess:
 
                     self.castling_types.append(castling_type)
 
+    """
+    Copy of the game that can be played on its own, for searches or what-if
+    analysis. Only the board is copied: the engine shares the simulated state
+    with the game until one of them changes it, so forking is cheap even
+    when the state is large.
+    """
+    def fork(self):
+        game = copy.copy(self)
+
+        #pieces are changed in place by the moves
+        game.board = [[piece.copy() for piece in column] for column in self.board]
+        game.engine = self.engine.fork(game)
+
+        return game
+
     def is_game_over(qchess):
         black_king_count = 0
         white_king_count = 0
@@ -146,7 +200,7 @@ class QChess:
         return self.width * y + x
 
     def get_board_point(self, index):
-        return Point(index % self.width, int(index/self.width))
+        return self.paths.points[index]
 
     def get_piece(self, index):
         pos = self.get_board_point(index)
@@ -164,39 +218,21 @@ class QChess:
 
         self.engine.on_add_piece(x, y, piece)
 
+    #not including source or target
     def get_path_points(self, source, target):
-        #not including source or target
-        path = []
-
-        if not self.in_bounds(source.x, source.y):
-            return path
-        if not self.in_bounds(target.x, target.y):
-            return path
-        if source == target:
-            return path
+        return self.paths.get_path_points(source, target)
 
-        vec = target - source
-        if vec.x != 0 and vec.y != 0 and abs(vec.x) != abs(vec.y):
-            return path
-
-        x_iter = y_iter = 0
-
-        if vec.x != 0:
-            x_iter = vec.x/abs(vec.x)
-        if vec.y != 0:
-            y_iter = vec.y/abs(vec.y)
-
-        for i in range(1, max(abs(vec.x), abs(vec.y))):
-            path.append(source + Point(x_iter * i, y_iter * i))
-
-        return path
+    #same as get_path_points, with the array indices of the squares
+    def get_path_indices(self, source, target):
+        return self.paths.get_path_indices(source, target)
 
     def get_path_pieces(self, source, target):
         pieces = []
 
         for point in self.get_path_points(source, target):
-            if self.board[point.x][point.y] != NullPiece:
-                pieces.append(self.board[point.x][point.y])
+            piece = self.board[point.x][point.y]
+            if piece != NullPiece:
+                pieces.append(piece)
 
         return pieces
 
@@ -600,6 +636,18 @@ class QChess:
             if self.collapse_allowed and command == 'collapse':
                 self.collapse_board()
                 success = True
+            elif command.startswith('save '):
+                #imported here since qchess.save depends on this module
+                from .save import save_game
+
+                try:
+                    save_game(self, command[len('save '):])
+                    print('Game saved')
+                except (OSError, ValueError, NotImplementedError) as error:
+                    print('Error while saving game - ' + str(error))
+
+                #saving doesn't use the turn
+                success = False
             else:
                 success = self.perform_command_move(
                     command, check_current_turn=check_current_turn)
@@ -0,0 +1,216 @@
+import json
+import struct
+
+import numpy as np
+
+from .point import Point
+from .piece import *
+from .pawn import Pawn
+from .quantum_chess import QChess
+from .engines import get_engine_name
+
+"""
+Save and load a game in progress, with its classical board and the
+simulated state of its engine.
+
+File format (little endian):
+    8 bytes     MAGIC
+    8 bytes     length of the header
+    header      json with the game, the engine state and the position of every array
+    arrays      raw data of every array, aligned to ALIGNMENT bytes
+
+The arrays are memory-mapped copy-on-write when a game is loaded, so even
+a large statevector is only read from disk when it's used.
+"""
+
+MAGIC = b'QCHESS\x00\x01'
+ALIGNMENT = 64
+
+#bits of the piece flags
+COLLAPSED = 1
+HAS_MOVED = 2
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _point_to_list(point):
+    return None if point is None else [point.x, point.y]
+
+
+def _list_to_point(values):
+    return None if values is None else Point(*values)
+
+
+def _write(path, header, arrays):
+    entries = []
+    offset = 0
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    for name, array in arrays.items():
+        entries.append({
+            'name': name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset
+        })
+
+        offset = _align(offset + array.nbytes)
+
+    header = dict(header, arrays=entries)
+    encoded = json.dumps(header).encode('utf-8')
+
+    data_start = _align(len(MAGIC) + 8 + len(encoded))
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<Q', len(encoded)))
+        file.write(encoded)
+
+        for entry, array in zip(entries, arrays.values()):
+            file.seek(data_start + entry['offset'])
+            file.write(array.tobytes())
+
+        #the last array may be shorter than its alignment
+        file.truncate(data_start + offset)
+
+
+def _read(path):
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a saved game'.format(path))
+
+        data = file.read(8)
+        if len(data) != 8:
+            raise ValueError('{} is not a saved game'.format(path))
+
+        length, = struct.unpack('<Q', data)
+        header = json.loads(file.read(length).decode('utf-8'))
+
+    if not isinstance(header, dict) or any(
+            key not in header for key in ['game', 'engine', 'engine_state', 'arrays']):
+        raise ValueError('{} is not a saved game'.format(path))
+
+    data_start = _align(len(MAGIC) + 8 + length)
+
+    arrays = {}
+    for entry in header['arrays']:
+        shape = tuple(entry['shape'])
+
+        #empty arrays can't be mapped
+        if np.prod(shape, dtype=int) == 0:
+            arrays[entry['name']] = np.zeros(shape, dtype=entry['dtype'])
+            continue
+
+        arrays[entry['name']] = np.memmap(
+            path, dtype=entry['dtype'], mode='c', offset=data_start + entry['offset'], shape=shape)
+
+    return header, arrays
+
+
+"""
+Save the game to path.
+The engine must be registered in qchess.engines, so it can be created again.
+"""
+
+
+def save_game(qchess, path):
+    engine_name = get_engine_name(type(qchess.engine))
+    if engine_name is None:
+        raise ValueError('Only the engines registered in qchess.engines can be saved')
+
+    size = qchess.width * qchess.height
+
+    pieces = np.full((size, 2), -1, dtype=np.int8)
+    flags = np.zeros(size, dtype=np.uint8)
+    qflags = [0] * size
+
+    for i in range(size):
+        piece = qchess.get_piece(i)
+        if piece == NullPiece:
+            continue
+
+        pieces[i] = [piece.type, piece.color]
+        flags[i] = COLLAPSED * piece.collapsed | HAS_MOVED * piece.has_moved
+
+        #qflags may not fit in 64 bits
+        qflags[i] = piece.qflag
+
+    game = {
+        'width': qchess.width,
+        'height': qchess.height,
+        'current_turn': int(qchess.current_turn),
+        'pawn_double_step_allowed': qchess.pawn_double_step_allowed,
+        'pawn_promotion_allowed': qchess.pawn_promotion_allowed,
+        'ep_pawn_point': _point_to_list(qchess.ep_pawn_point),
+        'castling_types': [
+            {key: _point_to_list(point) for key, point in castling_type.items()}
+            for castling_type in qchess.castling_types],
+        'qflags': qflags
+    }
+
+    engine_info, arrays = qchess.engine.save_state()
+
+    #engine arrays can't be confused with the board ones
+    arrays = {'engine.' + name: array for name, array in arrays.items()}
+    arrays['pieces'] = pieces
+    arrays['piece_flags'] = flags
+
+    _write(path, {'game': game, 'engine': engine_name,
+                  'engine_state': engine_info}, arrays)
+
+
+"""
+Load a game saved by save_game.
+Returns a QChess with the same engine, in the same position.
+"""
+
+
+def load_game(path):
+    header, arrays = _read(path)
+    game = header['game']
+    engine_name = header['engine']
+    engine_info = header['engine_state']
+
+    qchess = QChess(game['width'], game['height'], engine=engine_name,
+                    engine_options={engine_name: engine_info['options']})
+
+    qchess.current_turn = Color(game['current_turn'])
+    qchess.pawn_double_step_allowed = game['pawn_double_step_allowed']
+    qchess.pawn_promotion_allowed = game['pawn_promotion_allowed']
+    qchess.ep_pawn_point = _list_to_point(game['ep_pawn_point'])
+    qchess.castling_types = [
+        {key: _list_to_point(values) for key, values in castling_type.items()}
+        for castling_type in game['castling_types']]
+
+    pieces = arrays['pieces']
+    flags = arrays['piece_flags']
+
+    for i in range(qchess.width * qchess.height):
+        piece_type = PieceType(int(pieces[i][0]))
+        if piece_type == PieceType.NONE:
+            continue
+
+        color = Color(int(pieces[i][1]))
+
+        if piece_type == PieceType.PAWN:
+            piece = Pawn(color)
+        else:
+            piece = Piece(piece_type, color)
+
+        piece.collapsed = bool(flags[i] & COLLAPSED)
+        piece.has_moved = bool(flags[i] & HAS_MOVED)
+        piece.qflag = game['qflags'][i]
+
+        #the engine state is restored below, so the engine isn't notified
+        point = qchess.get_board_point(i)
+        qchess.board[point.x][point.y] = piece
+
+    engine_arrays = {
+        name[len('engine.'):]: array for name, array in arrays.items() if name.startswith('engine.')}
+
+    qchess.engine.load_state(engine_info, engine_arrays)
+
+    return qchess
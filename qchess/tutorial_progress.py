@@ -6,8 +6,11 @@ from .tutorial_qchess import TutorialQChess
 
 
 class TutorialProgress:
-    def __init__(self, is_ascii):
+    def __init__(self, is_ascii, engine=None, engine_options=None, seed=None):
         self.is_ascii = is_ascii
+        self.engine = engine
+        self.engine_options = engine_options
+        self.seed = seed
 
         self.config_path = 'tutorials/progress'
         self.template_path = 'tutorials/progress_template'
@@ -128,7 +131,8 @@ class TutorialProgress:
                     'Error while loading tutorial file {} - File not found'.format(first))
                 return
 
-            qchess = TutorialQChess(json.load(json_data))
+            qchess = TutorialQChess(json.load(json_data),
+                                    engine=self.engine, engine_options=self.engine_options, seed=self.seed)
 
             #run the main loop
             if self.is_ascii:
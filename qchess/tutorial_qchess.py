@@ -23,8 +23,9 @@ def _perform_check_action(obj_list, action):
 
 
 class TutorialQChess(QChess):
-    def __init__(self, tutorial_mode):
-        super().__init__(0, 0, game_mode=tutorial_mode)
+    def __init__(self, tutorial_mode, engine=None, engine_options=None, seed=None):
+        super().__init__(0, 0, game_mode=tutorial_mode,
+                         engine=engine, engine_options=engine_options, seed=seed)
 
         self.move_types = [
             {'name': 'Standard', 'move_number': 2,
@@ -369,12 +369,12 @@ class TestClassicalBoard(unittest.TestCase):
         self.assertEqual(qchess.get_simplified_matrix(), result)
 
     def test_get_path_points(self):
-        diagonal = [Point(1, 1), Point(2, 2), Point(3, 3)]
-        diagonal_inv = [Point(3, 3), Point(2, 2), Point(1, 1)]
-        row = [Point(1, 0), Point(2, 0), Point(3, 0)]
-        row_inv = [Point(3, 0), Point(2, 0), Point(1, 0)]
-        col = [Point(0, 1), Point(0, 2), Point(0, 3)]
-        col_inv = [Point(0, 3), Point(0, 2), Point(0, 1)]
+        diagonal = (Point(1, 1), Point(2, 2), Point(3, 3))
+        diagonal_inv = (Point(3, 3), Point(2, 2), Point(1, 1))
+        row = (Point(1, 0), Point(2, 0), Point(3, 0))
+        row_inv = (Point(3, 0), Point(2, 0), Point(1, 0))
+        col = (Point(0, 1), Point(0, 2), Point(0, 3))
+        col_inv = (Point(0, 3), Point(0, 2), Point(0, 1))
 
         qchess = QChess(5, 5)
         self.assertEqual(qchess.get_path_points(
@@ -388,6 +388,16 @@ class TestClassicalBoard(unittest.TestCase):
         self.assertEqual(qchess.get_path_points(
             Point(4, 0), Point(0, 0)), row_inv)
 
-        diagonal_different_sign = [Point(2, 1), Point(1, 2)]
+        diagonal_different_sign = (Point(2, 1), Point(1, 2))
         self.assertEqual(qchess.get_path_points(
             Point(3, 0), Point(0, 3)), diagonal_different_sign)
+
+        self.assertEqual(qchess.get_path_indices(Point(0, 0), Point(4, 4)), (6, 12, 18))
+        self.assertEqual(qchess.get_path_indices(Point(0, 0), Point(1, 3)), ())
+        self.assertEqual(qchess.get_path_indices(Point(0, 0), Point(5, 0)), ())
+        self.assertEqual(qchess.get_path_indices(Point(2, 2), Point(2, 2)), ())
+
+        #the table is shared by every game of the same size, and so are its paths
+        self.assertIs(QChess(5, 5).paths, qchess.paths)
+        self.assertIs(qchess.get_path_points(Point(0, 0), Point(4, 4)),
+                      qchess.get_path_points(Point(0, 0), Point(4, 4)))
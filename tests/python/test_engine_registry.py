@@ -0,0 +1,32 @@
+import unittest
+
+from qchess.quantum_chess import *
+from qchess.engines import get_engine_class, load_engine
+from qchess.engines.base_engine import BaseEngine
+from qchess.engines.statevector.statevector_engine import StatevectorEngine, FactorizedEngine
+
+
+class TestEngineRegistry(unittest.TestCase):
+    def test_load_engine(self):
+        self.assertIs(load_engine('statevector'), StatevectorEngine)
+        self.assertIs(load_engine('factorized'), FactorizedEngine)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            load_engine('unknown')
+
+    def test_auto_engine(self):
+        engine = get_engine_class('auto', 8, 8)
+        self.assertIs(engine, FactorizedEngine)
+
+        #engines without a size limit can be used by auto
+        self.assertFalse(BaseEngine.is_board_too_large(8, 8))
+
+    def test_game_mode_engine(self):
+        game_mode = {'board': ['K0', '00'], 'engine': 'statevector'}
+        qchess = QChess(0, 0, game_mode=game_mode)
+        self.assertIsInstance(qchess.engine, StatevectorEngine)
+
+        #the engine argument has priority over the game mode
+        qchess = QChess(0, 0, game_mode=game_mode, engine='factorized')
+        self.assertIsInstance(qchess.engine, FactorizedEngine)
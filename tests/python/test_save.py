@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from qchess.quantum_chess import *
+from qchess.save import save_game, load_game
+from qchess.engines.shots import run_shots
+
+
+class TestSave(unittest.TestCase):
+    def create_game(self, engine):
+        qchess = QChess(4, 4, engine=engine)
+        qchess.add_piece(0, 0, Piece(PieceType.ROOK, Color.WHITE))
+        qchess.add_piece(3, 3, Piece(PieceType.KNIGHT, Color.BLACK))
+        qchess.add_piece(1, 3, Pawn(Color.WHITE))
+
+        qchess.split_move(Point(0, 0), Point(0, 2), Point(2, 0))
+        qchess.split_move(Point(3, 3), Point(2, 1), Point(1, 2))
+        qchess.current_turn = Color.BLACK
+        qchess.ep_pawn_point = Point(1, 3)
+
+        return qchess
+
+    def test_save_and_load(self):
+        for engine in ['factorized', 'sparse', 'mps', 'statevector']:
+            qchess = self.create_game(engine)
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'game')
+                save_game(qchess, path)
+                loaded = load_game(path)
+
+                self.assertEqual(type(loaded.engine), type(qchess.engine))
+                self.assertEqual(loaded.get_simplified_matrix(), qchess.get_simplified_matrix())
+                self.assertEqual(loaded.current_turn, Color.BLACK)
+                self.assertEqual(loaded.ep_pawn_point, Point(1, 3))
+
+                for i in range(16):
+                    self.assertEqual(loaded.get_piece(i).collapsed, qchess.get_piece(i).collapsed)
+                    self.assertEqual(loaded.get_piece(i).qflag, qchess.get_piece(i).qflag)
+
+                #the loaded quantum state gives the same distribution
+                def action(qchess):
+                    qchess.collapse_board()
+
+                self.assertEqual(
+                    run_shots(qchess, [action], 1000).keys(), run_shots(loaded, [action], 1000).keys())
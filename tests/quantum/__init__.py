@@ -0,0 +1,21 @@
+#number of shots and allowed error of the probabilistic tests
+#shots are batched (see qchess.engines.shots), so they're cheap
+standard_shots = 1000
+standard_delta = 0.1
+
+entangle_shots = 1000
+entangle_delta = 0.1
+
+#print the obtained and expected probabilities of every test
+display_probabilities = False
+
+#engines the probabilistic tests run on (see quantum_test_engine.for_each_engine),
+#by a name for the test classes, with the registry name and the options of the engine
+test_engines = [
+    ('Factorized', 'factorized', {}),
+    ('Sparse', 'sparse', {}),
+    ('MPS', 'mps', {}),
+    ('Statevector', 'statevector', {}),
+    ('Qiskit', 'qiskit', {}),
+    ('QiskitLegacy', 'qiskit', {'incremental': False}),
+]
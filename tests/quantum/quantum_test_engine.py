@@ -1,13 +1,70 @@
+import sys
+import unittest
+
 from . import *
 
 from qchess.quantum_chess import QChess
+from qchess.engines import load_engine
+from qchess.engines.shots import run_shots
+
+
+def _is_engine_available(name):
+    try:
+        load_engine(name)
+    except ImportError:
+        #missing optional dependency
+        return False
+
+    return True
+
+
+"""
+Test case whose probabilistic tests run on an engine of test_engines,
+the first one by default.
+"""
+
+
+class QuantumTestCase(unittest.TestCase):
+    engine_name = test_engines[0][1]
+    engine_options = test_engines[0][2]
+
+    def create_engine(self):
+        return QuantumTestEngine(self.engine_name, self.engine_options)
+
+
+"""
+Class decorator for a QuantumTestCase, adds a copy of the test case to its
+module for every other engine of test_engines. The copies of engines that
+can't be imported are skipped.
+"""
+
+
+def for_each_engine(test_class):
+    module = sys.modules[test_class.__module__]
+
+    for label, name, options in test_engines[1:]:
+        case = type(test_class.__name__ + label, (test_class,), {
+            'engine_name': name,
+            'engine_options': options
+        })
+
+        case = unittest.skipIf(
+            not _is_engine_available(name), name + ' engine can\'t be imported')(case)
+
+        setattr(module, case.__name__, case)
+
+    return test_class
+
 
 class QuantumTestEngine():
-    def __init__(self):
+    def __init__(self, engine_name=None, engine_options=None):
         super().__init__()
         self.possible_bstates = []
         self.done = False
 
+        self.engine_name = engine_name
+        self.engine_options = engine_options or {}
+
     def add_board_state(self, state, prob):
         self.possible_bstates.append({'state': state, 'prob': prob, 'count': 0})
     
@@ -27,14 +84,18 @@ class QuantumTestEngine():
 
         self.n = n
 
-        for i in range(n):
-            qchess = QChess(self.width, self.height)
-            self.board_factory(qchess)
-            self.action(qchess)
+        #the board factory and the action are simulated once,
+        #branching only when they measure
+        qchess = QChess(self.width, self.height, engine=self.engine_name,
+                        engine_options={self.engine_name: self.engine_options})
+        boards = run_shots(qchess, [self.board_factory, self.action], n)
+
+        for board, count in boards.items():
+            state = [list(row) for row in board]
 
             for bstate in self.possible_bstates:
-                if bstate['state'] == qchess.get_simplified_matrix():
-                    bstate['count'] += 1
+                if bstate['state'] == state:
+                    bstate['count'] += count
                     break
         self.done = True
     
@@ -46,10 +107,10 @@ class QuantumTestEngine():
 
             #we display the probabilites in another loop to be able
             #to display all even if assert fails
-            for bstate in self.posible_bstates:
+            for bstate in self.possible_bstates:
                 print('Obtained: {} Expected: {}'.format(
                     round(bstate['count']/self.n, 2), bstate['prob']))
 
-        for bstate in self.posible_bstates:
+        for bstate in self.possible_bstates:
             test_case.assertAlmostEqual(
                 bstate['count']/self.n, bstate['prob'], places=places, delta=delta)
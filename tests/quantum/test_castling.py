@@ -1,15 +1,15 @@
-import unittest
 
 #import shots and delta default values
 from . import *
 
 from qchess.quantum_chess import *
-from .quantum_test_engine import QuantumTestEngine
+from .quantum_test_engine import QuantumTestCase, for_each_engine
 
 
-class TestCastling(unittest.TestCase):
+@for_each_engine
+class TestCastling(QuantumTestCase):
     def test_target_blocking(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0', '0', '0'],
@@ -48,7 +48,7 @@ class TestCastling(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_straight_path_blocking_entangle(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', 'Q', '0', '0', '0'],
@@ -79,7 +79,7 @@ class TestCastling(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_straight_path_blocking(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0', '0', '0'],
@@ -123,7 +123,7 @@ class TestCastling(unittest.TestCase):
     #I'm not sure which game mode would ever need something like this
     #but you can castle diagonally
     def test_diagonal_path_blocking(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0', '0', '0', '0'],
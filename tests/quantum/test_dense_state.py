@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from qchess.engines.statevector.dense_state import DenseState
+
+
+class TestDenseState(unittest.TestCase):
+    def test_iswap(self):
+        state = DenseState(3, np.random.default_rng())
+        state.x(0)
+        state.iswap(0, 2)
+
+        self.assertEqual(state.measure([0, 1, 2]), [False, False, True])
+
+    def test_basis_state(self):
+        #a basis state doesn't need the amplitudes of the whole board
+        state = DenseState(64, np.random.default_rng())
+        state.x(0)
+        state.x(63)
+        state.iswap(0, 1)
+        state.iswap_sqrt(1, 63)
+
+        self.assertIsNone(state.amplitudes)
+        self.assertEqual(state.measure([0, 1, 63]), [False, True, True])
+        self.assertTrue(state.measure_predicate([1, 2], lambda q1, q2: q1 and not q2))
+
+    def test_iswap_sqrt(self):
+        state = DenseState(2, np.random.default_rng())
+        state.x(1)
+        state.iswap_sqrt(0, 1)
+
+        self.assertAlmostEqual(abs(state.amplitudes[1]) ** 2, 0.5)
+        self.assertAlmostEqual(abs(state.amplitudes[2]) ** 2, 0.5)
+
+        #both squares can't be occupied at the same time
+        self.assertNotEqual(*state.measure([0, 1]))
+
+    def test_measure_predicate(self):
+        state = DenseState(3, np.random.default_rng())
+        state.x(2)
+        state.iswap_sqrt(0, 2)
+
+        #measuring qubit 1 doesn't affect the split piece
+        self.assertTrue(state.measure_predicate([1], lambda q1: not q1))
+        self.assertAlmostEqual(abs(state.amplitudes[1]) ** 2, 0.5)
+
+        occupied = state.measure_predicate([0], lambda q0: q0)
+        self.assertEqual(state.measure([0, 2]), [occupied, not occupied])
+
+    def test_measure_outcome(self):
+        state = DenseState(3, np.random.default_rng())
+        state.x(0)
+        state.x(1)
+        state.iswap_sqrt(0, 2)
+
+        #one step measures the sum of both squares and the value of qubit 1
+        outcome = state.measure_outcome(
+            [0, 1, 2], lambda q0, q1, q2: (q0 + q2, q1))
+        self.assertEqual(outcome, (1, True))
+
+        #the split piece is left untouched
+        self.assertAlmostEqual(abs(state.amplitudes[0b011]) ** 2, 0.5)
+        self.assertAlmostEqual(abs(state.amplitudes[0b110]) ** 2, 0.5)
@@ -0,0 +1,84 @@
+import unittest
+
+from qchess.quantum_chess import *
+from qchess.engines.entanglement import EntanglementGroups, split_qflags
+
+
+class TestEntanglement(unittest.TestCase):
+    def test_groups(self):
+        groups = EntanglementGroups()
+        for qflag in [1, 2, 4]:
+            groups.add(qflag)
+
+        groups.add_square(1, 0)
+        groups.add_square(2, 5)
+        groups.add_square(4, 7)
+
+        groups.union(1, 2)
+
+        self.assertEqual(groups.find(1), groups.find(2))
+        self.assertNotEqual(groups.find(1), groups.find(4))
+        self.assertEqual(sorted(groups.get_qflags(2)), [1, 2])
+        self.assertEqual(groups.get_squares(1), {0, 5})
+
+        qflags, squares = groups.remove(2)
+
+        self.assertEqual(sorted(qflags), [1, 2])
+        self.assertEqual(squares, {0, 5})
+        self.assertNotIn(1, groups)
+        self.assertIn(4, groups)
+
+    def test_recycled_qflags(self):
+        groups = EntanglementGroups()
+        qflag1 = groups.new_qflag()
+        qflag2 = groups.new_qflag()
+
+        self.assertEqual((qflag1, qflag2), (1, 2))
+
+        groups.add_square(qflag1, 0)
+        groups.add_square(qflag2, 1)
+
+        #the piece of qflag1 was captured
+        groups.remove_square(qflag1, 0)
+
+        self.assertEqual(groups.new_qflag(), qflag1)
+        self.assertEqual(groups.new_qflag(), 4)
+
+    def test_split_qflags(self):
+        self.assertEqual(split_qflags(0), [])
+        self.assertEqual(split_qflags(0b10110), [2, 4, 16])
+
+    def test_entangled_points(self):
+        qchess = QChess(4, 4)
+        qchess.add_piece(0, 0, Piece(PieceType.KNIGHT, Color.WHITE))
+        qchess.add_piece(3, 3, Piece(PieceType.KNIGHT, Color.BLACK))
+
+        qchess.split_move(Point(0, 0), Point(1, 2), Point(2, 1))
+
+        self.assertEqual(qchess.engine.get_all_entangled_points(1, 2), [Point(2, 1), Point(1, 2)])
+        self.assertEqual(qchess.engine.get_all_entangled_points(3, 3), [Point(3, 3)])
+        self.assertEqual(qchess.engine.get_all_entangled_points(0, 0), [])
+
+        #the collapsed knight leaves the group
+        qchess.engine.collapse_point(1, 2)
+
+        for point in [Point(1, 2), Point(2, 1)]:
+            if qchess.board[point.x][point.y] != NullPiece:
+                self.assertEqual(qchess.engine.get_all_entangled_points(point.x, point.y), [point])
+
+    def test_slide_double_occupancy(self):
+        qchess = QChess(5, 1)
+        qchess.add_piece(0, 0, Piece(PieceType.ROOK, Color.WHITE))
+        qchess.add_piece(4, 0, Piece(PieceType.ROOK, Color.BLACK))
+        qchess.add_piece(3, 0, Piece(PieceType.ROOK, Color.BLACK))
+
+        qchess.split_move(Point(3, 0), Point(2, 0), Point(1, 0))
+        engine = qchess.engine
+
+        #a single piece can't be in the path and in target at the same time
+        self.assertFalse(engine.does_slide_violate_double_occupancy(Point(0, 0), Point(2, 0)))
+
+        engine.entangle_flags(qchess.board[2][0].qflag, qchess.board[4][0].qflag)
+
+        self.assertTrue(engine.does_slide_violate_double_occupancy(Point(0, 0), Point(2, 0)))
+        self.assertFalse(engine.does_slide_violate_double_occupancy(Point(0, 0), Point(1, 0)))
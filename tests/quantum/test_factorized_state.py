@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from qchess.engines.statevector.factorized_state import FactorizedState
+
+
+class TestFactorizedState(unittest.TestCase):
+    def test_independent_groups(self):
+        state = FactorizedState(64, np.random.default_rng())
+        state.x(0)
+        state.x(10)
+        state.iswap_sqrt(0, 1)
+        state.iswap_sqrt(10, 11)
+
+        self.assertIsNot(state.groups[0], state.groups[10])
+        self.assertEqual(state.groups[0].state.num_qubits, 2)
+
+        #a jump between classical squares doesn't create a group
+        state.x(20)
+        state.iswap(20, 30)
+        self.assertIsNone(state.groups[30])
+        self.assertTrue(state.values[30])
+
+    def test_measure_removes_from_group(self):
+        state = FactorizedState(3, np.random.default_rng())
+        state.x(0)
+        state.iswap_sqrt(0, 1)
+
+        values = state.measure([0])
+
+        #the other square is known after measuring its partner
+        self.assertIsNone(state.groups[0])
+        self.assertIsNone(state.groups[1])
+        self.assertEqual(state.values[1], not values[0])
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from qchess.quantum_chess import *
+from qchess.engines.sampler import Sampler
+from qchess.engines.statevector.dense_state import DenseState
+
+
+class TestFork(unittest.TestCase):
+    def test_game_is_unchanged(self):
+        for engine in ['factorized', 'sparse', 'mps', 'statevector']:
+            qchess = QChess(3, 3, engine=engine)
+            qchess.add_piece(0, 0, Piece(PieceType.KNIGHT, Color.WHITE))
+            qchess.split_move(Point(0, 0), Point(1, 2), Point(2, 1))
+
+            fork = qchess.fork()
+            fork.collapse_board()
+
+            self.assertFalse(qchess.get_piece(7).collapsed)
+            self.assertFalse(qchess.get_piece(5).collapsed)
+
+            #merging back is only certain if the superposition wasn't measured
+            qchess.merge_move(Point(1, 2), Point(2, 1), Point(0, 0))
+            qchess.collapse_board()
+
+            self.assertEqual(qchess.get_simplified_matrix()[0], ['N', '0', '0'])
+
+    def test_same_seed(self):
+        qchess = QChess(4, 1, seed=3)
+        qchess.add_piece(0, 0, Piece(PieceType.ROOK, Color.WHITE))
+        qchess.split_move(Point(0, 0), Point(1, 0), Point(2, 0))
+
+        #both forks draw the same numbers
+        fork1 = qchess.fork()
+        fork2 = qchess.fork()
+        fork1.collapse_board()
+        fork2.collapse_board()
+
+        self.assertEqual(fork1.get_simplified_matrix(), fork2.get_simplified_matrix())
+
+    def test_shared_amplitudes(self):
+        state = DenseState(2, Sampler())
+        state.x(0)
+        state.iswap_sqrt(0, 1)
+
+        fork = state.fork(Sampler())
+        self.assertIs(fork.amplitudes, state.amplitudes)
+
+        amplitudes = state.amplitudes.copy()
+        fork.iswap_sqrt(0, 1)
+
+        self.assertTrue(np.array_equal(state.amplitudes, amplitudes))
+        self.assertAlmostEqual(fork.probability(1), 1)
@@ -1,15 +1,15 @@
-import unittest
 
 #import shots and delta default values
 from . import *
 
 from qchess.quantum_chess import *
-from .quantum_test_engine import QuantumTestEngine
+from .quantum_test_engine import QuantumTestCase, for_each_engine
 
 
-class TestJumpMove(unittest.TestCase):
+@for_each_engine
+class TestJumpMove(QuantumTestCase):
     def test_split_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', 'K', '0'],
@@ -27,7 +27,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_merge_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -51,7 +51,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_capture_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -92,7 +92,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_blocked_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -135,7 +135,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_standard_move_to_split(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -169,7 +169,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_double_split_merge(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', 'K'],
@@ -212,7 +212,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_two_piece_single_split_merge(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -255,7 +255,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_split_to_piece(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['K', '0', '0'],
@@ -288,7 +288,7 @@ class TestJumpMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_merge_proper_capture_collapse(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -334,3 +334,38 @@ class TestJumpMove(unittest.TestCase):
         engine.set_action(action)
         engine.run_engine(standard_shots)
         engine.run_tests(self, delta=standard_delta)
+
+    def test_collapsed_move_then_split(self):
+        engine = self.create_engine()
+        engine.add_board_state(
+            [
+                ['0', '0', '0'],
+                ['0', 'K', '0'],
+                ['0', '0', '0'],
+            ],
+            0.5
+        )
+
+        engine.add_board_state(
+            [
+                ['0', '0', 'K'],
+                ['0', '0', '0'],
+                ['0', '0', '0'],
+            ],
+            0.5
+        )
+
+        def board_factory(qchess):
+            qchess.add_piece(0, 0, Piece(PieceType.KING, Color.WHITE))
+
+        def action(qchess):
+            #the move only involves a collapsed piece and an empty square
+            qchess.standard_move(Point(0, 0), Point(1, 0))
+
+            qchess.split_move(Point(1, 0), Point(1, 1), Point(2, 0))
+            qchess.engine.collapse_all()
+
+        engine.set_board_factory(3, 3, board_factory)
+        engine.set_action(action)
+        engine.run_engine(standard_shots)
+        engine.run_tests(self, delta=standard_delta)
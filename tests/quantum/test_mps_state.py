@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from qchess.engines.mps.mps_state import MPSState
+
+
+class TestMPSState(unittest.TestCase):
+    def test_far_qubits(self):
+        state = MPSState(64, np.random.default_rng())
+        state.x(0)
+        state.iswap_sqrt(0, 63)
+
+        #a single split piece only needs a bond of 2
+        self.assertEqual(state.bond_dimension(), 2)
+        self.assertNotEqual(*state.measure([0, 63]))
+        self.assertEqual(state.bond_dimension(), 1)
+
+    def test_measure_outcome(self):
+        state = MPSState(3, np.random.default_rng(), sites=[2, 0, 1])
+        state.x(0)
+        state.x(1)
+        state.iswap_sqrt(0, 2)
+
+        #one step measures the sum of both squares and the value of qubit 1
+        outcome = state.measure_outcome(
+            [0, 1, 2], lambda q0, q1, q2: (q0 + q2, q1))
+        self.assertEqual(outcome, (1, True))
+
+        #the split piece is left untouched
+        self.assertEqual(state.bond_dimension(), 2)
+
+    def test_max_bond_dimension(self):
+        state = MPSState(4, np.random.default_rng(), max_bond_dimension=1)
+        state.x(0)
+        state.iswap_sqrt(0, 3)
+
+        self.assertEqual(state.bond_dimension(), 1)
+        self.assertFalse(state.measure_predicate([1, 2], lambda q1, q2: q1 or q2))
@@ -0,0 +1,62 @@
+import unittest
+
+from qchess.quantum_chess import *
+from qchess.engines import load_engine
+
+try:
+    load_engine('qiskit')
+    qiskit_available = True
+except ImportError:
+    qiskit_available = False
+
+
+class TestOccupancy(unittest.TestCase):
+    def create_game(self, engine):
+        qchess = QChess(3, 3, engine=engine)
+        qchess.add_piece(0, 0, Piece(PieceType.KNIGHT, Color.WHITE))
+        qchess.add_piece(2, 2, Piece(PieceType.KNIGHT, Color.BLACK))
+
+        return qchess
+
+    def check_split(self, engine):
+        qchess = self.create_game(engine)
+        qchess.split_move(Point(0, 0), Point(1, 2), Point(2, 1))
+
+        probabilities = qchess.engine.get_occupancy_probabilities()
+
+        for i, probability in enumerate([0, 0, 0, 0, 0, 0.5, 0, 0.5, 1]):
+            self.assertAlmostEqual(probabilities[i], probability)
+
+    def test_split(self):
+        for engine in ['factorized', 'sparse', 'mps', 'statevector']:
+            self.check_split(engine)
+
+    @unittest.skipIf(not qiskit_available, 'qiskit engine can\'t be imported')
+    def test_split_qiskit(self):
+        self.check_split('qiskit')
+
+    def test_cache(self):
+        qchess = self.create_game('factorized')
+        qchess.split_move(Point(0, 0), Point(1, 2), Point(2, 1))
+        qchess.split_move(Point(2, 2), Point(0, 1), Point(1, 0))
+
+        computed = []
+        get_square_probabilities = qchess.engine.get_square_probabilities
+
+        def record(indices):
+            computed.extend(indices)
+            return get_square_probabilities(indices)
+
+        qchess.engine.get_square_probabilities = record
+        qchess.engine.get_occupancy_probabilities()
+
+        self.assertEqual(sorted(computed), [1, 3, 5, 7])
+
+        #only the squares of the black knight are computed again
+        computed.clear()
+        qchess.standard_move(Point(1, 0), Point(2, 2))
+        probabilities = qchess.engine.get_occupancy_probabilities()
+
+        self.assertEqual(sorted(computed), [3, 8])
+        self.assertAlmostEqual(probabilities[7], 0.5)
+        self.assertAlmostEqual(probabilities[8], 0.5)
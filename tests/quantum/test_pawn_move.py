@@ -1,15 +1,15 @@
-import unittest
 
 #import shots and delta default values
 from . import *
 
 from qchess.quantum_chess import *
-from .quantum_test_engine import QuantumTestEngine
+from .quantum_test_engine import QuantumTestCase, for_each_engine
 
 
-class TestPawnMove(unittest.TestCase):
+@for_each_engine
+class TestPawnMove(QuantumTestCase):
     def test_capture(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -33,7 +33,7 @@ class TestPawnMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_capture_split_piece(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['p', '0', '0'],
@@ -66,7 +66,7 @@ class TestPawnMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_en_passant(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', '0'],
@@ -91,7 +91,7 @@ class TestPawnMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_capture_en_passant(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', 'p', '0'],
@@ -127,7 +127,7 @@ class TestPawnMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_blocked_en_passant(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', 'p', '0'],
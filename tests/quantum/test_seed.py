@@ -0,0 +1,21 @@
+import unittest
+
+from qchess.quantum_chess import *
+
+
+class TestSeed(unittest.TestCase):
+    def play(self, engine, seed):
+        qchess = QChess(4, 1, engine=engine, seed=seed)
+        qchess.add_piece(0, 0, Piece(PieceType.ROOK, Color.WHITE))
+
+        #every split doubles the possible positions of the rook
+        qchess.split_move(Point(0, 0), Point(1, 0), Point(2, 0))
+        qchess.split_move(Point(2, 0), Point(3, 0), Point(0, 0))
+        qchess.collapse_board()
+
+        return qchess.get_simplified_matrix()
+
+    def test_same_seed(self):
+        for engine in ['factorized', 'sparse', 'mps', 'statevector']:
+            for seed in range(10):
+                self.assertEqual(self.play(engine, seed), self.play(engine, seed))
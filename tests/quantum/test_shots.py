@@ -0,0 +1,36 @@
+import unittest
+
+from qchess.quantum_chess import *
+from qchess.engines.shots import run_shots
+from qchess.engines.statevector.statevector_engine import StatevectorEngine
+
+
+class TestShots(unittest.TestCase):
+    def test_prefix_runs_once(self):
+        calls = []
+
+        def board_factory(qchess):
+            calls.append(None)
+            qchess.add_piece(0, 0, Piece(PieceType.KING, Color.WHITE))
+            qchess.split_move(Point(0, 0), Point(1, 0), Point(0, 1))
+
+        def action(qchess):
+            qchess.engine.collapse_all()
+
+        qchess = QChess(2, 2, engine=StatevectorEngine)
+        boards = run_shots(qchess, [board_factory, action], 1000)
+
+        #the split doesn't measure, so it's only performed once
+        self.assertEqual(len(calls), 1)
+
+        self.assertEqual(sum(boards.values()), 1000)
+        self.assertEqual(set(boards.keys()), {
+            (('0', 'K'), ('0', '0')),
+            (('0', '0'), ('K', '0')),
+        })
+
+        for count in boards.values():
+            self.assertAlmostEqual(count / 1000, 0.5, delta=0.1)
+
+        #the original game is left untouched
+        self.assertEqual(qchess.get_simplified_matrix(), [['0', '0'], ['0', '0']])
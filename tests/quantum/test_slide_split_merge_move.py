@@ -1,15 +1,15 @@
-import unittest
 
 #import shots and delta default values
 from . import *
 
 from qchess.quantum_chess import *
-from .quantum_test_engine import QuantumTestEngine
+from .quantum_test_engine import QuantumTestCase, for_each_engine
 
 
-class TestSlideSplitMergeMove(unittest.TestCase):
+@for_each_engine
+class TestSlideSplitMergeMove(QuantumTestCase):
     def test_blocked_split(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['R', 'K', '0'],
@@ -52,7 +52,7 @@ class TestSlideSplitMergeMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_blocked_merge(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['R', '0', '0'],
@@ -87,7 +87,7 @@ class TestSlideSplitMergeMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_split_both_paths_blocked_entangle(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['R', 'K', 'R'],
@@ -109,7 +109,7 @@ class TestSlideSplitMergeMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_split_one_path_blocked_entangle(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', 'R'],
@@ -132,7 +132,7 @@ class TestSlideSplitMergeMove(unittest.TestCase):
 
     def test_clear_path_split_capture(self):
         #we don't manually collapse because we want to make sure the move doesn't collapse
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['0', '0', 'R'],
@@ -1,15 +1,15 @@
-import unittest
 
 #import shots and delta default values
 from . import *
 
 from qchess.quantum_chess import *
-from .quantum_test_engine import QuantumTestEngine
+from .quantum_test_engine import QuantumTestCase, for_each_engine
 
 
-class TestSlideStandardMove(unittest.TestCase):
+@for_each_engine
+class TestSlideStandardMove(QuantumTestCase):
     def test_nonclear_path_capture(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['Q', '0', '0'],
@@ -41,7 +41,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_blocked_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['Q', '0', '0'],
@@ -72,7 +72,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_nonclear_path_same_piece_move(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['Q', '0', '0'],
@@ -126,7 +126,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_nonclear_path_split_then_capture(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['Q', '0', '0'],
@@ -168,7 +168,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_nonclear_path_collapse(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['Q', '0', '0', '0'],
@@ -213,7 +213,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_bell_state_entangle(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['N', '0', '0'],
@@ -240,7 +240,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_bell_state(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
         engine.add_board_state(
             [
                 ['N', '0', '0'],
@@ -277,7 +277,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_one_piece_triple_split_capture_entangle(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
 
         #we don't want to collapse because we want to
         #make sure it's entangled properly
@@ -306,7 +306,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=entangle_delta)
 
     def test_one_piece_triple_split_capture(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
 
         engine.add_board_state(
             [
@@ -356,7 +356,7 @@ class TestSlideStandardMove(unittest.TestCase):
         engine.run_tests(self, delta=standard_delta)
 
     def test_two_piece_triple_split_capture(self):
-        engine = QuantumTestEngine()
+        engine = self.create_engine()
 
         engine.add_board_state(
             [
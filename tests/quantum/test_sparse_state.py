@@ -0,0 +1,26 @@
+import unittest
+
+import numpy as np
+
+from qchess.engines.sparse.sparse_state import SparseState
+
+
+class TestSparseState(unittest.TestCase):
+    def test_branches(self):
+        state = SparseState(64, np.random.default_rng())
+        state.x(0)
+        state.iswap_sqrt(0, 1)
+        state.iswap(1, 63)
+
+        #only the two branches of the split piece are stored
+        self.assertEqual(set(state.amplitudes.keys()), {1 << 0, 1 << 63})
+
+    def test_merge_cancels_branches(self):
+        state = SparseState(2, np.random.default_rng())
+        state.x(0)
+        state.iswap_sqrt(0, 1)
+        state.iswap_sqrt(0, 1)
+
+        #two sqrt iSwaps are a full iSwap
+        self.assertEqual(list(state.amplitudes.keys()), [1 << 1])
+        self.assertEqual(state.measure([0, 1]), [False, True])